@@ -11,6 +11,7 @@ from django.core.exceptions import ImproperlyConfigured
 from django.middleware.csrf import _sanitize_token, constant_time_compare
 
 from delicious_cake.http import HttpUnauthorized
+from delicious_cake.utils import LRUCache
 
 try:
     from hashlib import sha1
@@ -34,6 +35,11 @@ except ImportError:
     oauth_provider = None
 
 
+# ``DigestAuthentication``'s users & partial digests, keyed by ``(username,
+# realm)``.  Only trusted while they match what's in the shared cache.
+partial_digests = LRUCache(1024)
+
+
 class Authentication(object):
     """
     A simple base class to establish the protocol for auth.
@@ -62,6 +68,19 @@ class Authentication(object):
             request.META.get('REMOTE_ADDR', 'noaddr'),
             request.META.get('REMOTE_HOST', 'nohost'))
 
+    def identify(self, request):
+        """
+        Returns ``get_identifier`` for the request, working it out only once
+        per request (resources call this right after ``is_authenticated``,
+        then reuse it for throttling).
+        """
+        try:
+            return request._cake_identifier
+        except AttributeError:
+            identifier = request._cake_identifier = \
+                self.get_identifier(request)
+            return identifier
+
     def check_active(self, user):
         """
         Ensures the user has an active account.
@@ -157,10 +176,32 @@ class ApiKeyAuthentication(Authentication):
     Uses the ``ApiKey`` model that ships with delicious-cake. If you wish to use
     a different model, override the ``get_key`` method to perform the key check
     as suits your needs.
+
+    Optionally accepts a ``cache_timeout``, the number of seconds a
+    successful lookup is cached for (keyed on a hash of the username & API
+    key).  Cached lookups are dropped whenever the ``ApiKey`` is saved or
+    deleted.  Defaults to ``None``, meaning every request hits the database.
     """
+    def __init__(self, require_active=True, cache_timeout=None):
+        super(ApiKeyAuthentication, self).__init__(
+            require_active=require_active)
+        self.cache_timeout = cache_timeout
+
     def _unauthorized(self):
         return HttpUnauthorized()
 
+    def get_credentials(self, request):
+        """
+        Returns ``extract_credentials`` for the request, only extracting them
+        (which may mean parsing the body) once per request.
+        """
+        try:
+            return request._cake_api_key_credentials
+        except AttributeError:
+            credentials = request._cake_api_key_credentials = \
+                self.extract_credentials(request)
+            return credentials
+
     def extract_credentials(self, request):
         if request.META.get('HTTP_AUTHORIZATION') and request.META['HTTP_AUTHORIZATION'].lower().startswith('apikey '):
             (auth_type, data) = request.META['HTTP_AUTHORIZATION'].split()
@@ -186,23 +227,68 @@ class ApiKeyAuthentication(Authentication):
         User = get_user_model()
 
         try:
-            username, api_key = self.extract_credentials(request)
+            username, api_key = self.get_credentials(request)
         except ValueError:
             return self._unauthorized()
 
         if not username or not api_key:
             return self._unauthorized()
 
-        try:
-            user = User.objects.get_by_natural_key(username)
-        except (User.DoesNotExist, User.MultipleObjectsReturned):
+        if type(self).get_key.im_func is not ApiKeyAuthentication.get_key.im_func:
+            # A custom ``get_key`` needs the user first.
+            try:
+                user = User.objects.get_by_natural_key(username)
+            except (User.DoesNotExist, User.MultipleObjectsReturned):
+                return self._unauthorized()
+
+            if not self.check_active(user):
+                return False
+
+            request.user = user
+            return self.get_key(user, api_key)
+
+        user = self.get_user_for_key(username, api_key)
+
+        if user is None:
             return self._unauthorized()
 
         if not self.check_active(user):
             return False
 
         request.user = user
-        return self.get_key(user, api_key)
+        return True
+
+    def get_user_for_key(self, username, api_key):
+        """
+        Returns the user with the given username & API key, or ``None``.
+
+        Looks both up at once (and uses the cache, if ``cache_timeout`` is
+        set).
+        """
+        from django.core.cache import cache
+        from django.contrib.auth import get_user_model
+        from delicious_cake.models import ApiKey
+
+        if self.cache_timeout:
+            cache_key = ApiKey.get_cache_key(username, api_key)
+            user = cache.get(cache_key)
+
+            if user is not None:
+                return user
+
+        User = get_user_model()
+
+        try:
+            user = ApiKey.objects.select_related('user').get(**{
+                'key': api_key,
+                'user__%s' % User.USERNAME_FIELD: username}).user
+        except (ApiKey.DoesNotExist, ApiKey.MultipleObjectsReturned):
+            return None
+
+        if self.cache_timeout:
+            cache.set(cache_key, user, self.cache_timeout)
+
+        return user
 
     def get_key(self, user, api_key):
         """
@@ -224,7 +310,11 @@ class ApiKeyAuthentication(Authentication):
 
         This implementation returns the user's username.
         """
-        username, api_key = self.extract_credentials(request)
+        try:
+            username, api_key = self.get_credentials(request)
+        except ValueError:
+            return 'nouser'
+
         return username or 'nouser'
 
 
@@ -298,11 +388,23 @@ class DigestAuthentication(Authentication):
     ``realm``
         The realm to use in the ``HttpUnauthorized`` response.  Default:
         ``delicious-cake``.
+    ``cache_timeout``
+        If specified, the number of seconds the user's id & ``HA1`` partial
+        digest (never the API key itself) are cached for, per username.
+        They're dropped whenever the user's ``ApiKey`` is saved or deleted.
+        Default: ``None`` (no caching).
+    ``nonce_timeout``
+        If specified, nonces older than this many seconds are turned down,
+        and each nonce count may only be used once with a nonce (so a
+        captured request can't be replayed).  Default: ``None``.
     """
-    def __init__(self, backend=None, realm='delicious-cake', **kwargs):
+    def __init__(self, backend=None, realm='delicious-cake',
+                 cache_timeout=None, nonce_timeout=None, **kwargs):
         super(DigestAuthentication, self).__init__(**kwargs)
         self.backend = backend
         self.realm = realm
+        self.cache_timeout = cache_timeout
+        self.nonce_timeout = nonce_timeout
 
         if python_digest is None:
             raise ImproperlyConfigured("The 'python_digest' package could not be imported. It is required for use with the 'DigestAuthentication' class.")
@@ -338,26 +440,90 @@ class DigestAuthentication(Authentication):
         if not python_digest.validate_nonce(digest_response.nonce, getattr(settings, 'SECRET_KEY', '')):
             return self._unauthorized()
 
-        user = self.get_user(digest_response.username)
-        api_key = self.get_key(user)
+        if self.nonce_timeout is not None:
+            timestamp = python_digest.get_nonce_timestamp(digest_response.nonce)
 
-        if user is False or api_key is False:
+            if timestamp is None or time.time() - timestamp > self.nonce_timeout:
+                return self._unauthorized()
+
+        user, partial_digest = self.get_user_and_partial_digest(
+            digest_response.username)
+
+        if user is False or partial_digest is False:
             return self._unauthorized()
 
         expected = python_digest.calculate_request_digest(
-            request.method,
-            python_digest.calculate_partial_digest(digest_response.username, self.realm, api_key),
-            digest_response)
+            request.method, partial_digest, digest_response)
 
         if not digest_response.response == expected:
             return self._unauthorized()
 
+        # Only count the nonce as used once the request has checked out, so
+        # made up requests can't use nonce counts up.
+        if self.nonce_timeout is not None and \
+                not self.use_nonce_count(digest_response):
+            return self._unauthorized()
+
         if not self.check_active(user):
             return False
 
         request.user = user
         return True
 
+    def get_user_and_partial_digest(self, username):
+        """
+        Returns the user (from ``get_user``) and the (``HA1``) partial digest
+        of their API key (from ``get_key``) for ``username``, either of which
+        is ``False`` if not found.
+
+        With ``cache_timeout`` set, the user's id & partial digest are cached
+        (the API key never leaves the database).  The user & partial digest
+        are also kept per process, and used for as long as they match the
+        cached ones, so a cached lookup needs no queries.
+        """
+        from django.core.cache import cache
+        from delicious_cake.models import ApiKey
+
+        local_key = (username, self.realm)
+
+        if self.cache_timeout:
+            cache_key = ApiKey.get_digest_cache_key(username)
+            cached = cache.get(cache_key)
+            known = partial_digests.get(local_key)
+
+            if cached is not None and known is not None and \
+                    cached == (known[0].pk, self.realm, known[1]):
+                return known
+
+        user = self.get_user(username)
+        api_key = False if user is False else self.get_key(user)
+
+        if user is False or api_key is False:
+            return user, api_key
+
+        partial_digest = python_digest.calculate_partial_digest(
+            username, self.realm, api_key)
+
+        if self.cache_timeout:
+            partial_digests.set(local_key, (user, partial_digest))
+            cache.set(cache_key, (user.pk, self.realm, partial_digest),
+                      self.cache_timeout)
+
+        return user, partial_digest
+
+    def use_nonce_count(self, digest_response):
+        """
+        Records that the request's nonce count has been used with its nonce,
+        returning ``False`` if it already had been (the request is a replay).
+        """
+        from django.core.cache import cache
+
+        cache_key = 'delicious_cake_digest_nonce:%s' % sha1('%s:%s' % (
+            digest_response.nonce, digest_response.nc)).hexdigest()
+
+        # ``add`` is atomic, so only one of two concurrent replays gets in.
+        return cache.add(cache_key, True, self.nonce_timeout)
+
     def get_user(self, username):
         from django.contrib.auth import get_user_model
         User = get_user_model()
@@ -472,7 +638,7 @@ class OAuthAuthentication(Authentication):
         return oauth_server.verify_request(oauth_request, consumer, token)
 
 
-class MultiAuthentication(object):
+class MultiAuthentication(Authentication):
     """
     An authentication backend that tries a number of backends in order.
     """
@@ -1,11 +1,32 @@
+import copy
+import types
+import collections
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import md5
+
 try:
     from django.utils.copycompat import deepcopy
 except ImportError:
     from copy import deepcopy
 
+from django.core.cache import cache
+from django.utils.encoding import smart_str
+
 from delicious_cake import fields
+from delicious_cake.utils import LRUCache
+from delicious_cake.exceptions import InvalidFieldsError
+
+__all__ = ('EntityMetaclass', 'Entity', 'FieldPlan',)
+
 
-__all__ = ('EntityMetaclass', 'Entity',)
+# One precompiled step of ``Entity.full_process``.  Built once per ``Entity``
+# class by ``EntityMetaclass`` and shared by every instance.
+FieldPlan = collections.namedtuple('FieldPlan', (
+    'field_name', 'field', 'getter', 'hook', 'hook_takes_obj',
+    'has_default', 'convert',))
 
 
 class EntityMetaclass(type):
@@ -42,49 +63,445 @@ class EntityMetaclass(type):
             if hasattr(field_object, 'contribute_to_class'):
                 field_object.contribute_to_class(new_class, field_name)
 
+        new_class.field_plan = cls.compile_field_plan(new_class)
+        new_class.wire_field_plans = {}
+        new_class.restricted_classes = LRUCache(64)
+
         return new_class
 
+    @staticmethod
+    def compile_field_plan(new_class, serializer=None, base_fields=None):
+        """
+        Resolves everything ``full_process`` needs to know about each field
+        (attribute getter, ``process_<name>`` hook, default and converter)
+        once, when the class is created, instead of once per object.
+
+        Given a ``serializer``, the fields' wire mode converters are used.
+        ``base_fields`` defaults to the class's.
+        """
+        plan = []
+
+        if base_fields is None:
+            base_fields = new_class.base_fields
+
+        for field_name, field_object in base_fields.items():
+            hook = EntityMetaclass.get_hook(
+                new_class, 'process_%s' % field_name)
+            hook_takes_obj = field_object.attribute is None
+
+            # The hook is handed the object itself, so there's no point in
+            # looking the attribute up first.
+            if hook is not None and hook_takes_obj:
+                getter = None
+            else:
+                getter = field_object.compile_getter()
+
+            plan.append(FieldPlan(
+                field_name=field_name, field=field_object, getter=getter,
+                hook=hook, hook_takes_obj=hook_takes_obj,
+                has_default=field_object.has_default(),
+                convert=field_object.convert if serializer is None else
+                field_object.get_wire_convert(serializer)))
+
+        return tuple(plan)
+
+    @staticmethod
+    def get_hook(new_class, name):
+        """
+        Returns the ``name`` hook as a callable taking the entity and its
+        argument, or ``None``.  Plain methods are called unbound; anything
+        else (``staticmethod``s, ``classmethod``s, ...) is looked up on each
+        entity, as ``getattr(entity, name)`` would.
+        """
+        for klass in new_class.__mro__:
+            if name in klass.__dict__:
+                hook = klass.__dict__[name]
+
+                if isinstance(hook, types.FunctionType):
+                    return hook
+
+                return lambda entity, value: getattr(entity, name)(value)
+
+        return None
+
 
 class Entity(object):
     __metaclass__ = EntityMetaclass
 
+    # Extra ``__`` attribute paths read outside of the declared fields (e.g.
+    # by ``get_resource_uri`` or ``process``).  Only used to work out what
+    # list resources load from their querysets (see ``project_fields`` and
+    # ``infer_related`` in ``ListResourceOptions``); the primary key is
+    # always included.  Entities that override ``process``, ``full_process``
+    # or ``get_resource_uri`` are loaded as full objects unless they set it
+    # (``()`` if they only need the primary key).
+    required_attributes = None
+
+    # In wire mode, processing for a serializer gives values in their final,
+    # serialized form (e.g. datetimes as formatted by the serializer) rather
+    # than as Python objects, so the serializer has nothing left to convert.
+    # Overrides of ``full_process`` on such entities are handed the
+    # serializer and must accept it.
+    wire = False
+
+    # Cache each object's processed output for ``cache_timeout`` seconds (or
+    # not at all if ``None``), keyed by the object's primary key and the
+    # value of ``cache_version_attribute`` (a ``__`` attribute path to
+    # something that changes whenever the object does, e.g. an
+    # ``updated_at`` column).  Without a version, cached output is only
+    # refreshed when it expires.
+    cache_timeout = None
+    cache_version_attribute = None
+
     def __init__(self, obj):
         self.obj = obj
-        self.fields = deepcopy(self.base_fields)
+
+    def _get_fields(self):
+        # Copied from ``base_fields`` when first used, so entities that never
+        # look at their fields don't pay for it.
+        try:
+            return self._fields
+        except AttributeError:
+            self._fields = deepcopy(self.base_fields)
+            return self._fields
+
+    def _set_fields(self, fields):
+        self._fields = fields
+
+    # This entity's own fields.  Entities whose fields have been used are
+    # processed from them rather than from the class's ``field_plan``.
+    fields = property(_get_fields, _set_fields)
 
     def process(self, data):
         return data
 
-    def full_process(self):
-        processed_data = {}
+    def full_process(self, serializer=None):
+        return self.process_entities((self,), serializer)[0]
 
-        for field_name, field_object in self.fields.items():
-            processed_field_data = field_object.process(self.obj)
+    @classmethod
+    def process_many(cls, objects, serializer=None):
+        """
+        Processes an iterable of objects (typically one page of a list
+        response), returning a list of processed dicts in the same order.
 
-            method = getattr(self, 'process_%s' % field_name, None)
+        Equivalent to ``[cls(obj).full_process() for obj in objects]``, but
+        the per-class lookups are done once for the whole page rather than
+        once per object.
 
-            if method:
-                if field_object.attribute is None:
-                    processed_field_data = method(self.obj)
-                else:
-                    processed_field_data = method(processed_field_data)
+        Subclasses can override this to do set-based work up front, e.g.
+        resolving a lookup table for a ``process_<name>`` hook once per page,
+        before delegating to the default implementation.
 
-            if processed_field_data is None and field_object.has_default:
-                processed_field_data = field_object.default
+        ``serializer`` is the serializer the result is for, which is only
+        passed (and only used) in wire mode (see ``wire``).
 
-            if processed_field_data is not None:
-                processed_field_data = \
-                    field_object.convert(processed_field_data)
+        With ``cache_timeout`` set, objects already in the cache aren't
+        processed again (see ``process_cached``).
+        """
+        if cls.cache_timeout is not None:
+            return cls.process_cached(objects, serializer)
 
-            processed_data[field_name] = processed_field_data
+        return cls.process_uncached(objects, serializer)
+
+    @classmethod
+    def process_uncached(cls, objects, serializer=None):
+        if cls.full_process.im_func is not Entity.full_process.im_func:
+            # Respect subclasses that customize ``full_process``.
+            if serializer is not None and cls.wire:
+                return [cls(obj).full_process(serializer) for obj in objects]
+
+            return [cls(obj).full_process() for obj in objects]
+
+        return cls.process_entities(
+            [cls(obj) for obj in objects], serializer)
+
+    @classmethod
+    def process_cached(cls, objects, serializer=None):
+        """
+        Like ``process_many``, but looks all of the ``objects`` up in the
+        cache at once, only processes the ones that aren't there and caches
+        those (again all at once).
+
+        Objects without a primary key (dicts, unsaved instances, ...) can't
+        be told apart, so they're always processed and never cached.
+        """
+        objects = list(objects)
+        keys = [cls.get_cache_key(obj, serializer) for obj in objects]
+
+        processed = cache.get_many([key for key in keys if key is not None])
+        missed = [index for index, key in enumerate(keys)
+                  if key is None or key not in processed]
+
+        results = [processed.get(key) for key in keys]
+
+        if missed:
+            fresh = {}
+
+            for index, data in zip(missed, cls.process_uncached(
+                    [objects[index] for index in missed], serializer)):
+                results[index] = data
+
+                if keys[index] is not None:
+                    fresh[keys[index]] = data
+
+            if fresh:
+                cache.set_many(fresh, cls.cache_timeout)
+
+        return results
+
+    @classmethod
+    def get_cache_key(cls, obj, serializer=None):
+        """
+        Returns the key ``obj``'s processed output is cached under, made up
+        of the entity class, the object's primary key & version and, in wire
+        mode, the serializer's formatting.  ``None`` if it has no primary key.
+        """
+        pk = fields.resolve_attribute_path(obj, ('pk',))
+
+        if pk is None:
+            return None
+
+        version = None
+
+        if cls.cache_version_attribute is not None:
+            version = fields.resolve_attribute_path(
+                obj, cls.cache_version_attribute.split('__'))
+
+        formatting = None
+
+        if serializer is not None and cls.wire:
+            formatting = (
+                serializer.__class__.__module__,
+                serializer.__class__.__name__, serializer.datetime_formatting)
+
+        return 'delicious_cake_entity_%s' % md5(smart_str(
+            u'%s.%s:%r:%r:%r' % (
+                cls.__module__, cls.__name__, pk, version,
+                formatting))).hexdigest()
+
+    @classmethod
+    def get_field_plan(cls, serializer=None):
+        """
+        Returns the ``field_plan`` for processing for ``serializer``, which is
+        compiled with the fields' wire mode converters if ``wire`` is set.
+
+        Plans are shared by serializers of the same class and
+        ``datetime_formatting`` (as processed entities are cached), so
+        building a ``Serializer`` per request doesn't compile one each time.
+        """
+        if serializer is None or not cls.wire:
+            return cls.field_plan
+
+        key = (serializer.__class__, serializer.datetime_formatting)
 
         try:
-            if 'resource_uri' not in processed_data:
-                processed_data['resource_uri'] = self.get_resource_uri()
-        except NotImplementedError:
-            pass
+            return cls.wire_field_plans[key]
+        except KeyError:
+            plan = cls.wire_field_plans[key] = \
+                EntityMetaclass.compile_field_plan(cls, serializer)
+            return plan
+
+    @classmethod
+    def restrict(cls, fields=None, exclude=None):
+        """
+        Returns a subclass that only processes the ``fields`` given, less
+        those in ``exclude`` (both lists of field names, or ``__`` paths into
+        ``EntityField`` entities, like ``flavor__name``).  ``None`` means no
+        restriction.  Unless it's a declared field, ``resource_uri`` is
+        always included.
+
+        Raises ``InvalidFieldsError`` for names the entity doesn't have.
+        Subclasses are created once per distinct restriction.
+        """
+        if not fields and not exclude:
+            return cls
+
+        key = (fields and tuple(sorted(fields)),
+               exclude and tuple(sorted(exclude)))
+
+        restricted_cls = cls.restricted_classes.get(key)
+
+        if restricted_cls is None:
+            base_fields = cls.base_fields
+
+            if fields:
+                base_fields = cls.select_fields(base_fields, fields, True)
+
+            if exclude:
+                base_fields = cls.select_fields(base_fields, exclude, False)
+
+            restricted_cls = EntityMetaclass(
+                '%s(fields=%s, exclude=%s)' % ((cls.__name__,) + key),
+                (cls,), {'__module__': cls.__module__})
+
+            restricted_cls.base_fields = base_fields
+            restricted_cls.field_plan = \
+                EntityMetaclass.compile_field_plan(restricted_cls)
+
+            cls.restricted_classes.set(key, restricted_cls)
+
+        return restricted_cls
+
+    @classmethod
+    def select_fields(cls, base_fields, paths, include):
+        """
+        Returns the ``base_fields`` named by ``paths`` if ``include`` is set,
+        or the ones that aren't otherwise.  Fields named by nested paths are
+        copied, with their entity restricted.
+        """
+        nested_paths = {}
+        invalid = []
+
+        for path in paths:
+            field_name, _, nested_path = path.partition('__')
+            field_object = base_fields.get(field_name)
+
+            # The URI added by ``process_entities``.
+            if field_object is None and path == 'resource_uri':
+                continue
+
+            if field_object is None or (nested_path and not isinstance(
+                    field_object, fields.EntityField)):
+                invalid.append(path)
+                continue
+
+            nested = nested_paths.setdefault(field_name, [])
+
+            # A whole field trumps any paths into it.
+            if nested is not None and nested_path:
+                nested.append(nested_path)
+            else:
+                nested_paths[field_name] = None
+
+        selected = {}
+
+        for field_name, field_object in base_fields.items():
+            nested = nested_paths.get(field_name, ())
+
+            if nested is None:
+                if include:
+                    selected[field_name] = field_object
+
+                continue
+
+            if not nested:
+                if not include:
+                    selected[field_name] = field_object
+
+                continue
+
+            field_object = copy.copy(field_object)
+
+            try:
+                field_object.entity_cls = field_object.entity_cls.restrict(
+                    **{'fields' if include else 'exclude': nested})
+            except InvalidFieldsError, e:
+                invalid.extend('%s__%s' % (field_name, nested_name)
+                               for nested_name in e.field_names)
+
+            selected[field_name] = field_object
+
+        if invalid:
+            raise InvalidFieldsError(invalid)
+
+        return selected
+
+    @classmethod
+    def get_attribute_paths(cls, strict=True):
+        """
+        Returns the (pre-split) attribute paths the entity reads from its
+        object, including those of nested ``EntityField`` entities, or
+        ``None`` if some field needs the full object.
+
+        With ``strict=False``, fields that need the full object are skipped
+        and the paths that are known are returned.
+        """
+        if strict and cls.required_attributes is None and any(
+                getattr(cls, name).im_func is not getattr(Entity, name).im_func
+                for name in ('process', 'full_process', 'get_resource_uri')):
+            # Could read anything.
+            return None
+
+        paths = [('pk',)]
+        paths.extend(tuple(attrs.split('__'))
+                     for attrs in cls.required_attributes or ())
+
+        if cls.cache_version_attribute is not None:
+            paths.append(tuple(cls.cache_version_attribute.split('__')))
+
+        for plan in cls.field_plan:
+            if plan.hook is not None and plan.hook_takes_obj:
+                if strict:
+                    return None
+
+                continue
+
+            field_paths = plan.field.get_attribute_paths(strict=strict)
+
+            if field_paths is None:
+                if strict:
+                    return None
+
+                continue
+
+            paths.extend(field_paths)
+
+        return paths
+
+    @classmethod
+    def process_entities(cls, entities, serializer=None):
+        """
+        Walks the class's ``field_plan`` over each of the ``entities`` (which
+        must be instances of ``cls``) and returns their processed dicts.
+        """
+        plan = cls.get_field_plan(serializer)
+
+        include_resource_uri = 'resource_uri' not in cls.base_fields and \
+            cls.get_resource_uri.im_func is not \
+            Entity.get_resource_uri.im_func
+
+        processed = []
+        append = processed.append
+
+        for entity in entities:
+            obj = entity.obj
+            processed_data = {}
+
+            entity_plan = plan
+
+            if '_fields' in entity.__dict__:
+                entity_plan = EntityMetaclass.compile_field_plan(
+                    cls, serializer if cls.wire else None, entity._fields)
+
+            for (field_name, field_object, getter, hook, hook_takes_obj,
+                    has_default, convert) in entity_plan:
+                if getter is not None:
+                    processed_field_data = getter(obj)
+
+                if hook is not None:
+                    if hook_takes_obj:
+                        processed_field_data = hook(entity, obj)
+                    else:
+                        processed_field_data = hook(
+                            entity, processed_field_data)
+
+                if processed_field_data is None and has_default:
+                    processed_field_data = field_object.default
+
+                if processed_field_data is not None:
+                    processed_field_data = convert(processed_field_data)
+
+                processed_data[field_name] = processed_field_data
+
+            if include_resource_uri:
+                try:
+                    processed_data['resource_uri'] = entity.get_resource_uri()
+                except NotImplementedError:
+                    pass
+
+            append(entity.process(processed_data))
 
-        return self.process(processed_data)
+        return processed
 
     def get_resource_uri(self):
         raise NotImplementedError()
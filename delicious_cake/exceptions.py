@@ -70,6 +70,16 @@ class ApiFieldError(DeliciousCakeError):
     pass
 
 
+class InvalidFieldsError(DeliciousCakeError):
+    """
+    Raised when a sparse fieldset names fields an ``Entity`` doesn't have.
+    """
+    def __init__(self, field_names):
+        super(InvalidFieldsError, self).__init__(
+            'Invalid fields: %s' % ', '.join(field_names))
+        self.field_names = field_names
+
+
 class ValidationError(DeliciousCakeError):
     def __init__(self, form_errors):
         self.form_errors = form_errors
@@ -1,5 +1,6 @@
 import re
 import datetime
+import operator
 from decimal import Decimal
 from dateutil.parser import parse
 
@@ -16,10 +17,37 @@ DATETIME_REGEX = re.compile(
         ':(?P<minute>\d{2}):(?P<second>\d{2}).*?$')
 
 
+def resolve_attribute_path(obj, attrs):
+    """
+    Follows the (pre-split) ``attrs`` path through ``obj``, looking through
+    relations and calling any callables found along the way.
+    """
+    current_object = obj
+
+    if isinstance(obj, dict):
+        for attr in attrs:
+            if current_object is None:
+                return None
+
+            current_object = current_object.get(attr, None)
+
+            if callable(current_object):
+                current_object = current_object()
+    else:
+        for attr in attrs:
+            current_object = getattr(current_object, attr, None)
+
+            if callable(current_object):
+                current_object = current_object()
+
+    return current_object
+
+
 class ApiField(object):
     """The base implementation of an entity field."""
     processed_type = 'string'
     help_text = ''
+    wire_simplify = False
 
     def __init__(self, attr=None, default=None, help_text=None):
         """
@@ -63,6 +91,22 @@ class ApiField(object):
     def attribute(self):
         return self._attribute
 
+    @property
+    def attribute_path(self):
+        """
+        Returns the ``__`` separated lookup path (``attr`` falling back to the
+        field's name) pre-split into a tuple, or ``None`` if there is neither.
+        """
+        attrs = self._attribute
+
+        if attrs is None:
+            attrs = self._field_name
+
+        if attrs is None:
+            return None
+
+        return tuple(attrs.split('__'))
+
     @property
     def field_name(self):
         return self._field_name
@@ -80,38 +124,97 @@ class ApiField(object):
         """
         return value
 
+    def get_wire_convert(self, serializer):
+        """
+        Returns the ``convert`` used when the entity is in wire mode (see
+        ``Entity.wire``), which gives values in their final, serialized form
+        for ``serializer``.
+
+        Fields whose ``convert`` returns a type the serializers don't use as
+        is (dates & times, decimals) set ``wire_simplify`` and have their
+        values put through ``serializer.to_simple`` here, instead of when the
+        whole response is serialized.
+        """
+        convert = self.convert
+
+        if not self.wire_simplify:
+            return convert
+
+        to_simple = serializer.to_simple
+        options = {}
+
+        def wire_convert(value):
+            return to_simple(convert(value), options)
+
+        return wire_convert
+
     def process(self, obj):
         """
         Takes data from the provided object and prepares it for the
         resource.
         """
-        attrs = None
-
-        if self._attribute is not None:
-            attrs = self._attribute
-        elif self._field_name is not None:
-            attrs = self._field_name
+        attrs = self.attribute_path
 
         if attrs is not None:
-            current_object = obj
+            return resolve_attribute_path(obj, attrs)
+
+    def overrides_process(self):
+        """
+        Returns whether this field customizes ``process``, in which case it
+        can't be assumed to just follow its attribute path.
+        """
+        return type(self).process.im_func is not ApiField.process.im_func
 
-            # Check for `__` in the field for looking through the relation.
-            attrs = attrs.split('__')
+    def get_attribute_paths(self, strict=True):
+        """
+        Returns the list of (pre-split) attribute paths this field reads from
+        the object being processed, or ``None`` if that can't be known (the
+        field customizes ``process``).
 
-            if isinstance(obj, dict):
-                for attr in attrs:
-                    current_object = current_object.get(attr, None)
+        With ``strict=False``, unknown paths are left out instead.
+        """
+        if self.overrides_process():
+            return None if strict else []
 
-                    if callable(current_object):
-                        current_object = current_object()
-            else:
-                for attr in attrs:
-                    current_object = getattr(current_object, attr, None)
+        attrs = self.attribute_path
+
+        return [] if attrs is None else [attrs]
+
+    def compile_getter(self):
+        """
+        Returns a callable taking the object being processed and returning
+        the same data as ``process``.
 
-                    if callable(current_object):
-                        current_object = current_object()
+        The attribute path is split once, up front, so the callable can be
+        reused for every object an ``Entity`` class processes.  Fields that
+        override ``process`` get their bound ``process`` back unchanged.
+        """
+        if self.overrides_process():
+            return self.process
+
+        attrs = self.attribute_path
+
+        if attrs is None:
+            return lambda obj: None
+
+        attrgetter = operator.attrgetter('.'.join(attrs))
+
+        def getter(obj):
+            # Plain attribute chains are resolved in C by ``attrgetter``.
+            # Dicts, missing attributes and callables take the slow path,
+            # which knows how to handle them.
+            if not isinstance(obj, dict):
+                try:
+                    value = attrgetter(obj)
+                except AttributeError:
+                    pass
+                else:
+                    if not callable(value):
+                        return value
+
+            return resolve_attribute_path(obj, attrs)
 
-            return current_object
+        return getter
 
 
 class CharField(ApiField):
@@ -182,6 +285,7 @@ class DecimalField(ApiField):
     """
     processed_type = 'decimal'
     help_text = 'Fixed precision numeric data. Ex: 26.73'
+    wire_simplify = True
 
     def convert(self, value):
         if value is None:
@@ -238,6 +342,7 @@ class DateField(ApiField):
     """
     processed_type = 'date'
     help_text = 'A date as a string. Ex: "2010-11-10"'
+    wire_simplify = True
 
     def convert(self, value):
         if isinstance(value, basestring):
@@ -258,6 +363,7 @@ class DateField(ApiField):
 class TimeField(ApiField):
     processed_type = 'time'
     help_text = 'A time as string. Ex: "20:05:23"'
+    wire_simplify = True
 
     def convert(self, dt):
         try:
@@ -274,6 +380,7 @@ class TimeField(ApiField):
 class DateTimeField(ApiField):
     processed_type = 'datetime'
     help_text = 'A date & time as a string. Ex: "2010-11-10T03:07:43"'
+    wire_simplify = True
 
     def convert(self, value):
         if isinstance(value, basestring):
@@ -303,6 +410,24 @@ class EntityField(ApiField):
         self.entity_cls = entity_cls
         super(EntityField, self).__init__(*args, **kwargs)
 
+    def get_attribute_paths(self, strict=True):
+        paths = super(EntityField, self).get_attribute_paths(strict=strict)
+        nested_paths = self.entity_cls.get_attribute_paths(strict=strict)
+
+        if not paths or nested_paths is None:
+            return None if strict else []
+
+        return [paths[0] + nested_path for nested_path in nested_paths]
+
     def convert(self, value):
         if value is not None:
             return self.entity_cls(value).full_process()
+
+    def get_wire_convert(self, serializer):
+        entity_cls = self.entity_cls
+
+        def wire_convert(value):
+            if value is not None:
+                return entity_cls.process_many((value,), serializer)[0]
+
+        return wire_convert
@@ -1,7 +1,8 @@
 """
 The various HTTP responses for use in returning proper HTTP codes.
 """
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
 
 
 class HttpCreated(HttpResponse):
@@ -70,6 +71,10 @@ class HttpGone(HttpResponse):
     status_code = 410
 
 
+class HttpRequestEntityTooLarge(HttpResponse):
+    status_code = 413
+
+
 class HttpUnsupportedMediaType(HttpResponse):
     status_code = 415
 
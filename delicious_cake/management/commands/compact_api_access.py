@@ -0,0 +1,98 @@
+import time
+import collections
+from optparse import make_option
+
+from django.db import transaction
+from django.db.models import F
+from django.core.management.base import NoArgsCommand, CommandError
+
+from delicious_cake.models import ApiAccess, ApiAccessRollup
+
+
+class Command(NoArgsCommand):
+    help = "Rolls ``ApiAccess`` records up into per minute/hour/day counts and deletes them."
+
+    option_list = NoArgsCommand.option_list + (
+        make_option(
+            '--periods', dest='periods',
+            default=','.join(period for period, label in ApiAccessRollup.PERIOD_CHOICES),
+            help='Comma-separated periods to roll up into (minute, hour, day).'),
+        make_option(
+            '--batch-size', dest='batch_size', type='int', default=10000,
+            help='How many ApiAccess records to compact per transaction.'),
+        make_option(
+            '--older-than', dest='older_than', type='int', default=0,
+            help='Only compact records at least this many seconds old.'),)
+
+    def handle_noargs(self, **options):
+        """Rolls ``ApiAccess`` records up into ``ApiAccessRollup`` counts and deletes them."""
+        self.verbosity = int(options.get('verbosity', 1))
+
+        periods = [period.strip() for period in options['periods'].split(',')]
+
+        for period in periods:
+            if period not in ApiAccessRollup.PERIOD_SECONDS:
+                raise CommandError("Unknown period '%s'." % period)
+
+        batch_size = options['batch_size']
+
+        if batch_size < 1:
+            raise CommandError("The batch size must be at least 1.")
+
+        cutoff = int(time.time()) - options['older_than']
+        compacted = 0
+
+        while True:
+            count = self.compact_batch(periods, cutoff, batch_size)
+
+            if not count:
+                break
+
+            compacted += count
+
+            if self.verbosity >= 2:
+                print u"Compacted %d records" % count
+
+        if self.verbosity >= 1:
+            print u"Compacted %d API access records" % compacted
+
+    def compact_batch(self, periods, cutoff, batch_size):
+        """
+        Adds (up to) ``batch_size`` of the oldest records to the rollups and
+        deletes them, in one transaction.  Returns the number of records.
+        """
+        with transaction.commit_on_success():
+            pks = list(ApiAccess.objects.filter(accessed__lt=cutoff).order_by(
+                'pk').values_list('pk', flat=True)[:batch_size])
+
+            if not pks:
+                return 0
+
+            counts = collections.defaultdict(int)
+
+            records = ApiAccess.objects.filter(pk__in=pks).values_list(
+                'identifier', 'url', 'request_method', 'accessed')
+
+            for identifier, url, request_method, accessed in records:
+                for period in periods:
+                    bucket = ApiAccessRollup.get_bucket(accessed, period)
+                    counts[(period, bucket, identifier, url, request_method)] += 1
+
+            new_rollups = []
+
+            for key, count in counts.iteritems():
+                period, bucket, identifier, url, request_method = key
+                lookup = dict(
+                    period=period, bucket=bucket, identifier=identifier,
+                    url=url, request_method=request_method)
+
+                updated = ApiAccessRollup.objects.filter(**lookup).update(
+                    count=F('count') + count)
+
+                if not updated:
+                    new_rollups.append(ApiAccessRollup(count=count, **lookup))
+
+            ApiAccessRollup.objects.bulk_create(new_rollups)
+            ApiAccess.objects.filter(pk__in=pks).delete()
+
+        return len(pks)
@@ -19,7 +19,10 @@ class ApiAccess(models.Model):
     identifier = models.CharField(max_length=255)
     url = models.CharField(max_length=255, blank=True, default='')
     request_method = models.CharField(max_length=10, blank=True, default='')
-    accessed = models.PositiveIntegerField()
+    accessed = models.PositiveIntegerField(db_index=True)
+
+    class Meta:
+        index_together = (('identifier', 'accessed'),)
 
     def __unicode__(self):
         return u"%s @ %s" % (self.identifier, self.accessed)
@@ -29,6 +32,49 @@ class ApiAccess(models.Model):
         return super(ApiAccess, self).save(*args, **kwargs)
 
 
+class ApiAccessRollup(models.Model):
+    """
+    The number of ``ApiAccess`` records per identifier, URL & method within a
+    minute, hour or day, as built by the ``compact_api_access`` command.
+
+    ``bucket`` is the (UTC) timestamp the period starts at.
+    """
+    MINUTE = 'minute'
+    HOUR = 'hour'
+    DAY = 'day'
+
+    PERIOD_CHOICES = (
+        (MINUTE, 'Minute'),
+        (HOUR, 'Hour'),
+        (DAY, 'Day'),)
+
+    PERIOD_SECONDS = {
+        MINUTE: 60,
+        HOUR: 60 * 60,
+        DAY: 60 * 60 * 24,}
+
+    identifier = models.CharField(max_length=255)
+    url = models.CharField(max_length=255, blank=True, default='')
+    request_method = models.CharField(max_length=10, blank=True, default='')
+    period = models.CharField(max_length=6, choices=PERIOD_CHOICES)
+    bucket = models.PositiveIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (
+            ('period', 'bucket', 'identifier', 'url', 'request_method'),)
+        index_together = (('identifier', 'period', 'bucket'),)
+
+    def __unicode__(self):
+        return u"%s @ %s (%s): %s" % (
+            self.identifier, self.bucket, self.period, self.count)
+
+    @classmethod
+    def get_bucket(cls, timestamp, period):
+        """Returns the start of the ``period`` that ``timestamp`` falls in."""
+        return timestamp - timestamp % cls.PERIOD_SECONDS[period]
+
+
 if 'django.contrib.auth' in settings.INSTALLED_APPS:
     import uuid
     from django.conf import settings
@@ -54,6 +100,77 @@ if 'django.contrib.auth' in settings.INSTALLED_APPS:
             # Hmac that beast.
             return hmac.new(str(new_uuid), digestmod=sha1).hexdigest()
 
+        @staticmethod
+        def get_cache_key(username, key):
+            """
+            The cache key ``ApiKeyAuthentication`` stores the user under, for
+            a username & API key pair.
+            """
+            credentials = u'%s:%s' % (username, key)
+            return 'delicious_cake_api_key:%s' % sha1(
+                credentials.encode('utf-8')).hexdigest()
+
+        @staticmethod
+        def get_digest_cache_key(username):
+            """
+            The cache key ``DigestAuthentication`` stores the user & API key
+            under, for a username.
+            """
+            return 'delicious_cake_digest:%s' % sha1(
+                username.encode('utf-8')).hexdigest()
+
+
+    def invalidate_api_key_cache(sender, instance, signal=None, **kwargs):
+        """
+        A signal for dropping cached ``ApiKeyAuthentication`` &
+        ``DigestAuthentication`` lookups when an ``ApiKey`` changes (including
+        the key it's replacing) or goes away.
+
+        Connected both before and after saves & deletes: a request that looks
+        up the old key in between would otherwise cache it again.
+        """
+        from django.core.cache import cache
+        from django.contrib.auth import get_user_model
+
+        User = get_user_model()
+
+        # The key being replaced is only in the database before the save.
+        cache_keys = instance.__dict__.pop('_api_key_cache_keys', set())
+
+        if signal in (models.signals.pre_save, models.signals.pre_delete):
+            instance._api_key_cache_keys = cache_keys
+
+        if instance.pk is not None:
+            for key, user_id in ApiKey.objects.filter(
+                    pk=instance.pk).values_list('key', 'user'):
+                cache_keys.add((user_id, key))
+
+        if instance.user_id is not None:
+            cache_keys.add((instance.user_id, instance.key))
+
+        usernames = dict(User.objects.filter(
+            pk__in=[user_id for user_id, key in cache_keys]).values_list(
+                'pk', User.USERNAME_FIELD))
+
+        cache.delete_many([
+            ApiKey.get_cache_key(usernames[user_id], key)
+            for user_id, key in cache_keys if user_id in usernames] + [
+            ApiKey.get_digest_cache_key(username)
+            for username in usernames.values()])
+
+    models.signals.pre_save.connect(
+        invalidate_api_key_cache, sender=ApiKey,
+        dispatch_uid='delicious_cake_api_key_pre_save')
+    models.signals.pre_delete.connect(
+        invalidate_api_key_cache, sender=ApiKey,
+        dispatch_uid='delicious_cake_api_key_pre_delete')
+    models.signals.post_save.connect(
+        invalidate_api_key_cache, sender=ApiKey,
+        dispatch_uid='delicious_cake_api_key_post_save')
+    models.signals.post_delete.connect(
+        invalidate_api_key_cache, sender=ApiKey,
+        dispatch_uid='delicious_cake_api_key_post_delete')
+
 
     def create_api_key(sender, **kwargs):
         """
@@ -23,6 +23,33 @@ class DetailResourceOptions(object):
 
     throttle = BaseThrottle()
 
+    # The largest request body (in bytes) that will be deserialized into
+    # ``request.DATA``, or ``None`` for no limit.  Bigger ones get a 413.
+    max_body_size = None
+
+    # Cache GET responses (their content & headers) for
+    # ``response_cache_timeout`` seconds, or not at all if ``None``.
+    # Responses are cached per URL arguments, query parameters & format,
+    # and per requestor with ``response_cache_per_identifier`` -- which, if
+    # ``None``, is on whenever ``authentication`` is set.  Per-user headers
+    # (``Set-Cookie``, ...) are never cached.  Saving or deleting one of
+    # ``response_cache_models`` (or calling the resource's ``invalidate``)
+    # drops them all.
+    response_cache_timeout = None
+    response_cache_per_identifier = None
+    response_cache_models = ()
+
+    # Give 200 GET responses an ETag (a hash of their content) unless the
+    # resource's ``get_etag`` precondition hook supplies one, and answer
+    # requests with a matching ``If-None-Match`` with a 304.
+    etags = False
+
+    # Let clients pick the fields they get with comma-separated ``fields``
+    # and ``exclude`` query parameters (``__`` paths for the fields of nested
+    # ``EntityField`` entities).  Unknown fields get a 400.  List resources
+    # only load the columns the remaining fields need.
+    sparse_fieldsets = False
+
     def __new__(cls, name, meta=None):
         overrides = {}
 
@@ -55,6 +82,45 @@ class ListResourceOptions(DetailResourceOptions):
     max_limit = 100
     limit = getattr(settings, 'API_LIMIT_PER_PAGE', 20)
 
+    # How the paginator works out ``total_count``: 'exact', 'none',
+    # 'estimated' or 'cached' (see ``Paginator``).  ``None`` leaves it to
+    # the paginator ('exact', or 'none' for a ``CursorPaginator``).  These
+    # are only passed to the paginator when changed, so custom paginators
+    # needn't accept them.
+    count_strategy = None
+    count_cache_timeout = 300
+    max_exact_count = 10000
+
+    # Load ``QuerySet`` results with ``values_list``, restricted to the
+    # columns the entity reads, instead of as full model instances.  Falls
+    # back to model instances when the entity needs more than plain columns.
+    project_fields = False
+
+    # Add the ``select_related``/``prefetch_related`` lookups the entity's
+    # field paths (including nested ``EntityField`` entities) need to
+    # ``QuerySet`` results, so relations aren't loaded one object at a time.
+    # Off by default, as it changes the queries a resource makes; relations
+    # that are only counted (``pastries__count``) are never prefetched.
+    infer_related = False
+
+    # Stream list responses (JSON only) with a ``StreamingHttpResponse``,
+    # serializing each entity as it is processed instead of building the
+    # whole page in memory.  Entities are processed ``stream_chunk_size`` at
+    # a time.  Can be overridden per response with ``ResourceResponse``.
+    #
+    # Errors while processing the first chunk give the usual error response;
+    # once it's been sent, a later error can only truncate the body, leaving
+    # invalid JSON.  Resources with ``process_http_response`` hooks (which
+    # need the processed entities) aren't streamed.
+    stream = False
+    stream_chunk_size = 50
+
+    # For bulk PUTs & POSTs in a format that can be read incrementally
+    # (JSON), make ``request.DATA`` an iterator over the items of the
+    # collection (a top-level array or the ``collection_name`` member of a
+    # top-level object), parsed from the request stream as it's read.
+    stream_body = False
+
     def get_list_entity_cls(self):
         return self._get_entity_cls(
             self.entity_cls, self.list_entity_cls, self.detail_entity_cls)
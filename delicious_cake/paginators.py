@@ -1,10 +1,24 @@
+import datetime
 from urllib import urlencode
 
-from django.conf import settings
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import md5
 
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.utils.encoding import smart_str
+
+from delicious_cake.queries import estimate_count
 from delicious_cake.exceptions import BadRequest
 
-__all__ = ('Paginator',)
+__all__ = ('Paginator', 'CursorPaginator',)
 
 
 class Paginator(object):
@@ -19,8 +33,23 @@ class Paginator(object):
     ``total_count`` of resources seen and convenience links to the
     ``previous``/``next`` pages of data as available.
     """
+    COUNT_EXACT = 'exact'
+    COUNT_NONE = 'none'
+    COUNT_ESTIMATED = 'estimated'
+    COUNT_CACHED = 'cached'
+
+    COUNT_STRATEGIES = (
+        COUNT_EXACT, COUNT_NONE, COUNT_ESTIMATED, COUNT_CACHED,)
+
+    # Estimates below this are replaced by an exact count, which is cheap
+    # at that size (and estimates of small tables are the least reliable).
+    exact_count_threshold = 1000
+    exact_count_param = 'exact_count'
+
     def __init__(self, request_data, objects, resource_uri=None, limit=None,
-                 offset=0, max_limit=100, collection_name='objects'):
+                 offset=0, max_limit=100, collection_name='objects',
+                 count_strategy=COUNT_EXACT, count_cache_timeout=300,
+                 max_exact_count=10000):
         """
         Instantiates the ``Paginator`` and allows for some configuration.
 
@@ -41,6 +70,23 @@ class Paginator(object):
         Optionally accepts a ``max_limit`` argument, which the upper bound
         limit. Defaults to ``1000``. If you set it to 0 or ``None``, no upper
         bound will be enforced.
+
+        Optionally accepts a ``count_strategy`` argument, which decides how
+        ``total_count`` is worked out. One of:
+
+            * ``exact`` - count every object (``SELECT COUNT(*)``). Default.
+            * ``none`` - don't count; ``total_count`` is ``None`` and one
+              extra object is fetched to see if there's a ``next`` page.
+            * ``estimated`` - use the database's estimate (PostgreSQL only,
+              falling back to an exact count elsewhere).
+            * ``cached`` - cache exact counts per query for
+              ``count_cache_timeout`` seconds. Defaults to 300.
+
+        Unless the strategy is ``exact``, clients may ask for an exact count
+        with the ``exact_count`` GET parameter. It will count up to
+        ``max_exact_count`` objects. Defaults to 10000. ``None`` means no cap.
+        When there are more, ``total_count`` is the cap -- only a lower bound
+        -- and ``total_count_capped`` is added to the page's ``meta``.
         """
         self.request_data = request_data
         self.objects = objects
@@ -49,6 +95,15 @@ class Paginator(object):
         self.offset = offset
         self.resource_uri = resource_uri
         self.collection_name = collection_name
+        self.count_strategy = count_strategy
+        self.count_cache_timeout = count_cache_timeout
+        self.max_exact_count = max_exact_count
+        self.count_capped = False
+
+        if count_strategy not in self.COUNT_STRATEGIES:
+            raise ImproperlyConfigured(
+                "Unknown count strategy '%s'. Please use one of: %s." % (
+                    count_strategy, ', '.join(self.COUNT_STRATEGIES)))
 
     def get_limit(self):
         """
@@ -118,13 +173,88 @@ class Paginator(object):
 
     def get_count(self):
         """
-        Returns a count of the total number of objects seen.
+        Returns a count of the total number of objects seen, using the
+        ``count_strategy``, or ``None`` if they aren't counted.
+        """
+        strategy = self.count_strategy
+
+        if strategy == self.COUNT_EXACT:
+            return self.get_exact_count()
+
+        if self.request_data.get(self.exact_count_param) in (
+                '1', 'true', 'True', 'yes'):
+            return self.get_exact_count(cap=self.max_exact_count)
+
+        if strategy == self.COUNT_NONE:
+            return None
+
+        if not isinstance(self.objects, QuerySet):
+            # Anything else is already in memory; counting it is cheap.
+            return self.get_exact_count()
+
+        if strategy == self.COUNT_ESTIMATED:
+            return self.get_estimated_count()
+
+        return self.get_cached_count()
+
+    def get_exact_count(self, cap=None):
+        """
+        Returns an exact count of the total number of objects seen, counting
+        no further than ``cap`` if given.  If there are more, ``cap`` is
+        returned and ``count_capped`` is set.
         """
+        objects = self.objects
+
+        if cap is not None:
+            # One more, to tell "exactly ``cap``" from "more than ``cap``".
+            objects = objects[:cap + 1]
+
         try:
-            return self.objects.count()
+            count = objects.count()
         except (AttributeError, TypeError):
             # If it's not a QuerySet (or it's ilk), fallback to ``len``.
-            return len(self.objects)
+            count = len(objects)
+
+        if cap is not None and count > cap:
+            self.count_capped = True
+            return cap
+
+        return count
+
+    def get_estimated_count(self):
+        """
+        Returns the database's estimate of the number of objects, or an
+        exact count if there's no estimate or it's small enough for exact
+        counting to be cheap.
+        """
+        count = estimate_count(self.objects)
+
+        if count is None or count < self.exact_count_threshold:
+            return self.get_exact_count()
+
+        return count
+
+    def get_cached_count(self):
+        """
+        Returns an exact count, cached per query for ``count_cache_timeout``
+        seconds.
+        """
+        try:
+            sql, params = self.objects.query.sql_with_params()
+        except EmptyResultSet:
+            # It can't match anything (e.g. ``pk__in=[]``).
+            return 0
+
+        key = 'delicious_cake_count_%s' % md5(smart_str(u'%s:%s:%r' % (
+            self.objects.db, sql, params))).hexdigest()
+
+        count = cache.get(key)
+
+        if count is None:
+            count = self.get_exact_count()
+            cache.set(key, count, self.count_cache_timeout)
+
+        return count
 
     def get_previous(self, limit, offset):
         """
@@ -136,28 +266,40 @@ class Paginator(object):
 
         return self._generate_uri(limit, offset - limit)
 
-    def get_next(self, limit, offset, count):
+    def get_next(self, limit, offset, count, has_next=None):
         """
         If a next page is available, will generate a URL to request that
         page. If not available, this returns ``None``.
+
+        Without a ``count`` (or with a capped one), ``has_next`` says
+        whether there's a next page.
         """
-        if offset + limit >= count:
+        if has_next is not None:
+            if not has_next:
+                return None
+        elif count is None or offset + limit >= count:
             return None
 
         return self._generate_uri(limit, offset + limit)
 
     def _generate_uri(self, limit, offset):
+        return self._build_uri({'limit': limit, 'offset': offset})
+
+    def _build_uri(self, params, exclude=('limit', 'offset')):
+        """
+        Returns ``resource_uri`` with the request's query string, minus the
+        ``exclude`` parameters, plus ``params``.
+        """
         if self.resource_uri is None:
             return None
 
         try:
             # QueryDict has a urlencode method that can handle multiple values for the same key
             request_params = self.request_data.copy()
-            if 'limit' in request_params:
-                del request_params['limit']
-            if 'offset' in request_params:
-                del request_params['offset']
-            request_params.update({'limit': limit, 'offset': offset})
+            for key in exclude:
+                if key in request_params:
+                    del request_params[key]
+            request_params.update(params)
             encoded_params = request_params.urlencode()
         except AttributeError:
             request_params = {}
@@ -168,12 +310,11 @@ class Paginator(object):
                 else:
                     request_params[k] = v
 
-            if 'limit' in request_params:
-                del request_params['limit']
-            if 'offset' in request_params:
-                del request_params['offset']
+            for key in exclude:
+                if key in request_params:
+                    del request_params[key]
 
-            request_params.update({'limit': limit, 'offset': offset})
+            request_params.update(params)
             encoded_params = urlencode(request_params)
 
         return '%s?%s' % (self.resource_uri, encoded_params,)
@@ -188,15 +329,234 @@ class Paginator(object):
         limit = self.get_limit()
         offset = self.get_offset()
         count = self.get_count()
-        objects = self.get_slice(limit, offset)
+        has_next = None
+
+        if (count is None or self.count_capped) and limit:
+            # Fetch one extra to find out if there's a next page.
+            objects = list(self.get_slice(limit + 1, offset))
+            has_next = len(objects) > limit
+            objects = objects[:limit]
+        else:
+            objects = self.get_slice(limit, offset)
+
         meta = {
             'offset': offset,
             'limit': limit,
             'total_count': count}
 
+        if self.count_capped:
+            meta['total_count_capped'] = True
+
         if limit:
             meta['previous'] = self.get_previous(limit, offset)
-            meta['next'] = self.get_next(limit, offset, count)
+            meta['next'] = self.get_next(limit, offset, count, has_next)
+
+        return {
+            self.collection_name: objects, 'meta': meta}
+
+
+class CursorPaginator(Paginator):
+    """
+    Limits result sets using keyset ("cursor") pagination.
+
+    Rather than ``offset``, the position in the results is given by an
+    opaque, signed ``cursor`` parameter holding the ordering key of the
+    last (or first) object seen. Every page is then a plain ``WHERE ... ORDER
+    BY ... LIMIT`` query, which costs the same however deep it is.
+
+    The ``ordering`` (a tuple of field names, optionally prefixed with ``-``
+    for descending order) must uniquely identify each object, and none of
+    its fields may be null. Set it on a subclass and use that subclass as
+    the resource's ``paginator_cls``::
+
+        class CakePaginator(CursorPaginator):
+            ordering = ('-created', 'pk')
+
+    Objects that aren't a ``QuerySet`` are paginated by ``offset`` as usual.
+
+    Counting every object would undo the point of cursors, so the
+    ``count_strategy`` defaults to ``none``.
+    """
+    ordering = ('pk',)
+    cursor_param = 'cursor'
+
+    def __init__(self, request_data, objects, ordering=None, **kwargs):
+        kwargs.setdefault('count_strategy', self.COUNT_NONE)
+        super(CursorPaginator, self).__init__(request_data, objects, **kwargs)
+
+        if ordering is not None:
+            self.ordering = ordering
+
+        self.ordering = tuple(self.ordering)
+
+    def get_salt(self):
+        # Cursors from one ordering make no sense with another.
+        return 'delicious_cake.paginators.CursorPaginator:%s' % (
+            ','.join(self.ordering),)
+
+    def encode_cursor(self, key, forward):
+        """
+        Signs & encodes the ordering ``key`` of an object, and which way
+        to page from it, into an opaque string.
+        """
+        return signing.dumps(
+            [[self._encode_value(value) for value in key], int(forward)],
+            salt=self.get_salt(), compress=True)
+
+    def decode_cursor(self, cursor):
+        """
+        Returns the ``(key, forward)`` tuple encoded in ``cursor``.
+        """
+        try:
+            key, forward = signing.loads(cursor, salt=self.get_salt())
+        except (signing.BadSignature, TypeError, ValueError):
+            raise BadRequest(
+                "Invalid cursor '%s' provided." % cursor)
+
+        if len(key) != len(self.ordering):
+            raise BadRequest("Invalid cursor '%s' provided." % cursor)
+
+        return key, bool(forward)
+
+    def _encode_value(self, value):
+        if value is None or isinstance(value, (bool, int, long, float)):
+            return value
+
+        if isinstance(value, (datetime.datetime, datetime.date,
+                              datetime.time)):
+            return value.isoformat()
+
+        return unicode(value)
+
+    def get_cursor(self):
+        """
+        Returns the decoded ``cursor`` from the request, or ``None`` for the
+        first page.
+        """
+        cursor = self.request_data.get(self.cursor_param)
+
+        if not cursor:
+            return None
+
+        return self.decode_cursor(cursor)
+
+    def get_key(self, obj):
+        """
+        Returns the values of the ordering fields for ``obj``.
+        """
+        names = [name.lstrip('-') for name in self.ordering]
+        fields = getattr(self.objects, '_fields', None)
+
+        if isinstance(obj, dict):
+            return [obj[name] for name in names]
+
+        if isinstance(obj, tuple) and fields:
+            # ``values_list`` rows.
+            return [obj[list(fields).index(name)] for name in names]
+
+        key = []
+
+        for name in names:
+            value = obj
+
+            for attr in name.split('__'):
+                value = getattr(value, attr)
+
+            key.append(value)
+
+        return key
+
+    def get_key_filter(self, key, forward):
+        """
+        Returns a ``Q`` object matching the objects after (or, with
+        ``forward=False``, before) ``key`` in the ordering.
+        """
+        key_filter = None
+        equal = {}
+
+        for name, value in zip(self.ordering, key):
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+
+            lookup = 'lt' if descending == forward else 'gt'
+
+            condition = Q(**dict(equal, **{
+                '%s__%s' % (name, lookup): value}))
+
+            key_filter = condition if key_filter is None else \
+                key_filter | condition
+
+            equal[name] = value
+
+        return key_filter
+
+    def get_ordering(self, forward):
+        if forward:
+            return self.ordering
+
+        return tuple(
+            name[1:] if name.startswith('-') else '-%s' % name
+            for name in self.ordering)
+
+    def get_cursor_uri(self, limit, key, forward):
+        return self._build_uri(
+            {'limit': limit, self.cursor_param: self.encode_cursor(
+                key, forward)},
+            exclude=('limit', 'offset', self.cursor_param))
+
+    def page(self):
+        """
+        Generates all pertinent data about the requested page.
+
+        The ``previous``/``next`` links carry the cursor for the first/last
+        object on this page.
+        """
+        if not isinstance(self.objects, QuerySet):
+            return super(CursorPaginator, self).page()
+
+        limit = self.get_limit()
+        cursor = self.get_cursor()
+
+        if cursor is None:
+            key, forward = None, True
+        else:
+            key, forward = cursor
+
+        objects = self.objects.order_by(*self.get_ordering(forward))
+
+        if key is not None:
+            objects = objects.filter(self.get_key_filter(key, forward))
+
+        if limit:
+            # Fetch one extra to find out if there's anything beyond.
+            objects = list(objects[:limit + 1])
+            has_more = len(objects) > limit
+            objects = objects[:limit]
+        else:
+            objects = list(objects)
+            has_more = False
+
+        if not forward:
+            objects.reverse()
+
+        meta = {
+            'limit': limit,
+            'total_count': self.get_count()}
+
+        if limit:
+            has_next = has_more if forward else True
+            has_previous = has_more if not forward else key is not None
+
+            meta['previous'] = None
+            meta['next'] = None
+
+            if objects and has_previous:
+                meta['previous'] = self.get_cursor_uri(
+                    limit, self.get_key(objects[0]), False)
+
+            if objects and has_next:
+                meta['next'] = self.get_cursor_uri(
+                    limit, self.get_key(objects[-1]), True)
 
         return {
             self.collection_name: objects, 'meta': meta}
@@ -0,0 +1,350 @@
+import json
+
+from django.db import models, connections
+from django.db.models.query import QuerySet
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.db.models.fields import FieldDoesNotExist
+
+__all__ = ('ProjectedRow', 'QuerySetProjection', 'get_forward_fields',
+           'get_relation', 'get_related_lookups', 'add_related_lookups',
+           'get_columns', 'estimate_count', 'get_version', 'is_queryset',)
+
+
+class ProjectedRow(dict):
+    """
+    A row loaded through a ``QuerySetProjection``.
+
+    It's a plain ``dict`` as far as ``ApiField.process`` is concerned, but
+    also allows attribute access (``row.pk``) so entity code written against
+    model instances (``get_resource_uri`` and friends) keeps working.
+    """
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def get_forward_fields(model, path):
+    """
+    Resolves a (pre-split) attribute ``path`` against ``model``, following
+    forward ``ForeignKey``/``OneToOneField`` hops only.
+
+    Returns the list of model fields along the path, or ``None`` if any part
+    of it isn't a plain, forward model field (properties, methods, reverse or
+    many-to-many relations, ...).
+    """
+    fields = []
+
+    for name in path:
+        if model is None:
+            return None
+
+        if name == 'pk':
+            name = model._meta.pk.name
+
+        try:
+            field, field_model, direct, m2m = \
+                model._meta.get_field_by_name(name)
+        except FieldDoesNotExist:
+            return None
+
+        if not direct or m2m:
+            return None
+
+        fields.append(field)
+        model = field.rel.to if field.rel is not None else None
+
+    return fields
+
+
+def get_relation(model, name):
+    """
+    Looks up the relation reached through the attribute ``name`` on
+    instances of ``model``.
+
+    Returns a ``(related_model, multiple)`` tuple, where ``multiple`` is
+    ``True`` for relations that give a manager (reverse foreign keys and
+    many-to-many relations in either direction), or ``None`` if ``name``
+    isn't a relation.
+    """
+    if name == 'pk':
+        return None
+
+    try:
+        field, field_model, direct, m2m = model._meta.get_field_by_name(name)
+    except FieldDoesNotExist:
+        field = None
+
+    if field is not None and direct:
+        if field.rel is None:
+            return None
+
+        return field.rel.to, m2m
+
+    # Reverse relations are reached through their accessor name, which
+    # isn't necessarily the name ``get_field_by_name`` knows them by.
+    related_objects = model._meta.get_all_related_objects() + \
+        model._meta.get_all_related_many_to_many_objects()
+
+    for related in related_objects:
+        if related.get_accessor_name() == name:
+            return related.model, related.field.rel.multiple
+
+    return None
+
+
+# Manager methods that ask the database about a multi-valued relation
+# without loading it, so prefetching the relation would only cost more.
+AGGREGATE_METHODS = ('count', 'exists',)
+
+
+def get_related_lookups(model, paths):
+    """
+    Works out the ``select_related`` and ``prefetch_related`` lookups needed
+    to follow the (pre-split) attribute ``paths`` on instances of ``model``
+    without a query per object.
+
+    Single-valued relations (forward foreign keys and one-to-one relations
+    in either direction) are joined with ``select_related``.  The first
+    multi-valued relation along a path is prefetched, and the path isn't
+    followed any further -- unless the path only counts it (``pastries__count``
+    or ``pastries__exists``), in which case it's left alone.
+    """
+    select_related = set()
+    prefetch_related = set()
+
+    for path in paths:
+        current_model = model
+
+        for index, name in enumerate(path):
+            relation = get_relation(current_model, name)
+
+            if relation is None:
+                break
+
+            current_model, multiple = relation
+            lookup = '__'.join(path[:index + 1])
+
+            if multiple:
+                rest = path[index + 1:]
+
+                if len(rest) != 1 or rest[0] not in AGGREGATE_METHODS:
+                    prefetch_related.add(lookup)
+
+                break
+
+            select_related.add(lookup)
+
+    return sorted(select_related), sorted(prefetch_related)
+
+
+def _flatten_select_related(select_related, prefix=()):
+    lookups = []
+
+    for name, nested in select_related.items():
+        path = prefix + (name,)
+        lookups.append('__'.join(path))
+        lookups.extend(_flatten_select_related(nested, path))
+
+    return lookups
+
+
+def add_related_lookups(queryset, paths):
+    """
+    Adds the lookups from ``get_related_lookups`` to ``queryset``, on top of
+    any ``select_related``/``prefetch_related`` it already has.
+    """
+    select_related, prefetch_related = \
+        get_related_lookups(queryset.model, paths)
+
+    if select_related and queryset.query.select_related is not True:
+        # ``select_related(*fields)`` replaces earlier fields rather than
+        # adding to them, so keep the ones that were already there.
+        if queryset.query.select_related:
+            select_related = sorted(set(select_related) | set(
+                _flatten_select_related(queryset.query.select_related)))
+
+        queryset = queryset.select_related(*select_related)
+
+    prefetch_related = [
+        lookup for lookup in prefetch_related
+        if lookup not in queryset._prefetch_related_lookups]
+
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+
+    return queryset
+
+
+class QuerySetProjection(object):
+    """
+    Loads only the columns an ``Entity`` reads, as ``ProjectedRow`` dicts
+    instead of full model instances.
+
+    Built with ``for_model``, which returns ``None`` whenever the requested
+    paths can't be answered by ``values_list`` with the same results
+    ``getattr`` would give on a model instance.  The columns of any
+    ``ordering`` given (e.g. a ``CursorPaginator``'s, which reads its keys
+    from the loaded rows) are always loaded as well.
+    """
+    def __init__(self, paths, relation_paths=()):
+        # Relations along the way are loaded too (as their key), so a null
+        # relation comes out as ``None`` instead of a row full of ``None``s.
+        self.paths = sorted(set(paths) | set(relation_paths), key=len)
+        self.relation_paths = frozenset(relation_paths)
+        self.columns = ['__'.join(path) for path in self.paths]
+
+    @classmethod
+    def for_model(cls, model, paths, ordering=()):
+        paths = list(paths) + [
+            tuple(name.lstrip('-').split('__')) for name in ordering]
+        relation_paths = set()
+
+        for path in paths:
+            fields = get_forward_fields(model, path)
+
+            if not fields:
+                return None
+
+            # Only values that come back the same from ``values_list`` as
+            # from the model instance can be projected.  (Relations give
+            # their key rather than the related instance, except for ``pk``.)
+            if (fields[-1].rel is not None and path[-1] != 'pk') or \
+                    isinstance(fields[-1], models.FileField):
+                return None
+
+            for index in range(1, len(path)):
+                relation_paths.add(path[:index])
+
+        return cls(paths, relation_paths)
+
+    def apply(self, queryset):
+        """Restricts ``queryset`` to the projected columns."""
+        return queryset.values_list(*self.columns)
+
+    def rows(self, values):
+        """
+        Turns the tuples loaded by ``apply`` into (nested) ``ProjectedRow``
+        dicts, mirroring the ``__`` structure of the paths.
+        """
+        paths = self.paths
+        relation_paths = self.relation_paths
+        rows = []
+
+        for value_tuple in values:
+            row = ProjectedRow()
+
+            for path, value in zip(paths, value_tuple):
+                current = row
+
+                for attr in path[:-1]:
+                    current = current[attr]
+
+                    if current is None:
+                        break
+                else:
+                    if path in relation_paths:
+                        value = None if value is None else ProjectedRow()
+
+                    current[path[-1]] = value
+
+            rows.append(row)
+
+        return rows
+
+
+def get_columns(model, paths):
+    """
+    Returns the names of ``model``'s own columns the (pre-split) attribute
+    ``paths`` start from, for ``QuerySet.only``, or ``None`` if some path
+    doesn't start from a model field (so could read any column).
+
+    Many-to-many & reverse relations aren't columns, so they're left out.
+    """
+    columns = []
+
+    for path in paths:
+        name = path[0]
+
+        if name == 'pk':
+            name = model._meta.pk.name
+
+        try:
+            field, field_model, direct, m2m = \
+                model._meta.get_field_by_name(name)
+        except FieldDoesNotExist:
+            return None
+
+        if direct and not m2m and field.name not in columns:
+            columns.append(field.name)
+
+    return columns
+
+
+def is_queryset(objects):
+    """
+    Returns whether ``objects`` is a ``QuerySet`` of model instances (and not
+    one already restricted with ``values``/``values_list``).
+    """
+    return isinstance(objects, QuerySet) and \
+        getattr(objects, '_fields', None) is None
+
+
+def estimate_count(queryset):
+    """
+    Returns the database's estimate of the number of rows ``queryset`` will
+    return, without counting them, or ``None`` if no estimate is available.
+
+    Only PostgreSQL is supported: unfiltered querysets use the table's
+    ``pg_class.reltuples`` statistic, anything else the planner's estimate
+    from ``EXPLAIN``.
+    """
+    connection = connections[queryset.db]
+
+    if connection.vendor != 'postgresql':
+        return None
+
+    query = queryset.query
+    cursor = connection.cursor()
+
+    if not query.where.children and not query.having.children and \
+            not query.distinct and query.low_mark == 0 and \
+            query.high_mark is None:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(queryset.model._meta.db_table)])
+        row = cursor.fetchone()
+
+        # Tables that have never been analyzed have no (or -1) reltuples.
+        if row is not None and row[0] > 0:
+            return int(row[0])
+
+    try:
+        sql, params = query.sql_with_params()
+    except EmptyResultSet:
+        # It can't match anything (e.g. ``pk__in=[]``).
+        return 0
+
+    cursor.execute('EXPLAIN (FORMAT JSON) %s' % sql, params)
+    plan = cursor.fetchone()[0]
+
+    if isinstance(plan, basestring):
+        plan = json.loads(plan)
+
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_version(queryset, field='pk'):
+    """
+    Returns the greatest ``field`` value in ``queryset`` and its number of
+    rows, in one query.
+
+    With a field that changes on every save (``updated_at``, say), that's a
+    cheap stand-in for the results themselves in an ETag.  The default,
+    ``pk``, only notices rows being added & deleted.
+    """
+    version = queryset.order_by().aggregate(
+        latest=models.Max(field), count=models.Count('pk'))
+
+    return version['latest'], version['count']
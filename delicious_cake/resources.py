@@ -1,28 +1,48 @@
 import sys
+import time
 import logging
+import calendar
+import functools
+import itertools
 import traceback
 import collections
 
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import md5
+
 import django
 from django.conf import settings
+from django.core.cache import cache
 
 from django.db import models
+from django.db.models.query import QuerySet
 from django.views.generic import View
 from django import http as django_http
 from django.views.decorators.csrf import csrf_exempt
+from django.utils.cache import patch_vary_headers
+from django.utils.encoding import smart_str
+from django.utils.http import (
+    http_date, parse_http_date_safe, parse_etags, quote_etag,)
 from django.utils.translation import ugettext_lazy as _
 from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
 
 from delicious_cake import http as cake_http
 from delicious_cake.response import ResourceResponse
+from delicious_cake.queries import (
+    QuerySetProjection, add_related_lookups, get_columns, is_queryset,)
 from delicious_cake.utils import (
-    determine_format, build_content_type, is_valid_jsonp_callback_value,)
+    LazyData, determine_format, build_content_type,
+    is_valid_jsonp_callback_value,)
 from delicious_cake.options import DetailResourceOptions, ListResourceOptions
+from delicious_cake.authentication import Authentication
 
 from delicious_cake.exceptions import (
     ImmediateHttpResponse, BadRequest,
     UnsupportedSerializationFormat, UnsupportedDeserializationFormat,
-    WrongNumberOfValues, ResourceEntityError, ValidationError,)
+    WrongNumberOfValues, ResourceEntityError, ValidationError,
+    InvalidFieldsError,)
 
 __all__ = ('Resource', 'DetailResource', 'ListResource', 'MultipartResource',)
 
@@ -31,6 +51,10 @@ log = logging.getLogger('django.request.delicious_cake')
 
 NOT_FOUND_EXCEPTIONS = (ObjectDoesNotExist, django_http.Http404,)
 
+# Response headers meant for one user only, which the response cache drops.
+PER_USER_HEADERS = frozenset((
+    'set-cookie', 'set-cookie2', 'authentication-info',))
+
 
 class BaseResourceMetaClass(type):
     def __new__(cls, name, bases, attrs):
@@ -39,6 +63,7 @@ class BaseResourceMetaClass(type):
 
         opts = getattr(new_class, 'Meta', None)
         new_class._meta = cls.options_cls(name, opts)
+        new_class.connect_response_cache_signals()
 
         return new_class
 
@@ -93,13 +118,18 @@ class Resource(View):
 
         self.log_throttled_access(request)
 
-        if not isinstance(response, cake_http.HttpResponse):
+        if not isinstance(response, cake_http.HttpResponseBase):
             return cake_http.HttpNoContent()
 
         return response
 
     def is_authenticated(self, request):
-        auth_result = self._meta.authentication.is_authenticated(request)
+        authentication = self._meta.authentication
+        auth_result = authentication.is_authenticated(request)
+
+        # Work the identifier out while the credentials are at hand; it's
+        # reused by ``throttle_check`` & ``log_throttled_access``.
+        authentication.identify(request)
 
         if isinstance(auth_result, cake_http.HttpResponse):
             raise ImmediateHttpResponse(response=auth_result)
@@ -117,7 +147,7 @@ class Resource(View):
             self.raise_authorization_error()
 
     def throttle_check(self, request):
-        identifier = self._meta.authentication.get_identifier(request)
+        identifier = self._meta.authentication.identify(request)
 
         if self._meta.throttle.should_be_throttled(identifier):
             raise ImmediateHttpResponse(
@@ -126,9 +156,226 @@ class Resource(View):
     def log_throttled_access(self, request):
         request_method = request.method.lower()
         self._meta.throttle.accessed(
-            self._meta.authentication.get_identifier(request),
+            self._meta.authentication.identify(request),
             url=request.get_full_path(), request_method=request_method)
             
+    @classmethod
+    def connect_response_cache_signals(cls):
+        """
+        Invalidates the response cache whenever one of
+        ``response_cache_models`` is saved or deleted.
+        """
+        def invalidate_response_cache(sender, **kwargs):
+            cls.invalidate()
+
+        for model in cls._meta.response_cache_models:
+            for signal, signal_name in (
+                    (models.signals.post_save, 'post_save'),
+                    (models.signals.post_delete, 'post_delete')):
+                signal.connect(
+                    invalidate_response_cache, sender=model, weak=False,
+                    dispatch_uid='delicious_cake_response_cache_%s.%s_%s' % (
+                        cls.__module__, cls.__name__, signal_name))
+
+    @classmethod
+    def get_response_cache_generation_key(cls):
+        return 'delicious_cake_response_generation_%s.%s' % (
+            cls.__module__, cls.__name__)
+
+    @classmethod
+    def get_response_cache_generation(cls):
+        """
+        Returns the number included in this resource's response cache keys,
+        which ``invalidate`` bumps to drop every cached response at once.
+        """
+        key = cls.get_response_cache_generation_key()
+
+        generation = cache.get(key)
+
+        if generation is None:
+            # Start from the time, so responses cached under a generation
+            # that has since been evicted aren't picked up again.
+            cache.add(key, int(time.time() * 1000000))
+            generation = cache.get(key)
+
+        return generation
+
+    @classmethod
+    def invalidate(cls):
+        """Drops every response cached for this resource."""
+        try:
+            cache.incr(cls.get_response_cache_generation_key())
+        except ValueError:
+            # Not in the cache; the next lookup starts a new generation.
+            pass
+
+    def get_response_cache_key(self, request, *args, **kwargs):
+        """
+        Returns the key a GET response is cached under.  It's made up of the
+        resource, its URL arguments, the (sorted) query parameters, the
+        negotiated format and, with ``response_cache_per_identifier``, the
+        requestor's identifier.
+        """
+        params = sorted(
+            (key, sorted(values)) for key, values in request.GET.lists())
+
+        identifier = None
+        per_identifier = self._meta.response_cache_per_identifier
+
+        if per_identifier is None:
+            per_identifier = \
+                type(self._meta.authentication) is not Authentication
+
+        if per_identifier:
+            identifier = self._meta.authentication.identify(request)
+
+        return 'delicious_cake_response_%s' % md5(smart_str(
+            u'%s.%s:%s:%r:%r:%r:%s:%r' % (
+                self.__class__.__module__, self.__class__.__name__,
+                self.get_response_cache_generation(), args,
+                sorted(kwargs.items()), params,
+                self.determine_format(request), identifier))).hexdigest()
+
+    def dispatch_cached(self, create_response, request, *args, **kwargs):
+        """
+        Returns the response cached for ``request`` if there is one.
+        Otherwise returns ``create_response(request, *args, **kwargs)``,
+        caching it (its content & headers, less ``PER_USER_HEADERS``) for
+        ``response_cache_timeout`` seconds if it's a plain 200.
+        """
+        timeout = self._meta.response_cache_timeout
+
+        if timeout is None:
+            return create_response(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request, *args, **kwargs)
+        cached = cache.get(key)
+
+        if cached is not None:
+            content, headers = cached
+            response = cake_http.HttpResponse(content=content)
+
+            for header, value in headers:
+                response[header] = value
+
+            return response
+
+        response = create_response(request, *args, **kwargs)
+
+        if isinstance(response, cake_http.HttpResponse) and \
+                response.status_code == 200:
+            headers = [(header, value) for header, value in response.items()
+                       if header.lower() not in PER_USER_HEADERS]
+            cache.set(key, (response.content, headers), timeout)
+
+        return response
+
+    def get_etag(self, request, *args, **kwargs):
+        """
+        Precondition hook for GETs & HEADs: returns the resource's current
+        ETag (unquoted), or ``None``.
+
+        It's checked against ``If-None-Match`` before the handler runs, so a
+        match skips the query & serialization altogether.  It should be
+        cheap to work out, e.g. from a version column or
+        ``queries.get_version``.
+        """
+        return None
+
+    def get_last_modified(self, request, *args, **kwargs):
+        """
+        Precondition hook for GETs & HEADs, like ``get_etag``: returns when
+        the resource last changed (a ``datetime``, aware or in UTC), or
+        ``None``.  It's checked against ``If-Modified-Since``.
+        """
+        return None
+
+    def get_variant_etag(self, request, etag):
+        """
+        Returns the ``get_etag`` ``etag`` made specific to the representation
+        the request gets: its negotiated format and ``fields``/``exclude``
+        parameters.
+        """
+        return md5(smart_str(u'%s:%s:%s:%s' % (
+            etag, self.determine_format(request),
+            request.GET.get('fields', ''),
+            request.GET.get('exclude', '')))).hexdigest()
+
+    def is_not_modified(self, request, etag, last_modified):
+        """
+        Returns whether the client's copy is current, going by the request's
+        ``If-None-Match`` (if any) or else ``If-Modified-Since`` headers.
+        ``last_modified`` is a timestamp.
+        """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+
+        if if_none_match is not None:
+            if etag is None:
+                return False
+
+            etags = parse_etags(if_none_match)
+            return etag in etags or '*' in etags
+
+        if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+
+        if if_modified_since is not None and last_modified is not None:
+            if_modified_since = parse_http_date_safe(if_modified_since)
+
+            return if_modified_since is not None and \
+                last_modified <= if_modified_since
+
+        return False
+
+    def dispatch_conditional(self, create_response, request, *args, **kwargs):
+        """
+        Answers conditional GETs & HEADs with a 304 if the ``get_etag`` or
+        ``get_last_modified`` preconditions say the client is up to date.
+        Otherwise returns ``create_response(request, *args, **kwargs)`` with
+        ``ETag`` & ``Last-Modified`` headers.  Either way, the response
+        varies on ``Accept``, as the format is negotiated.
+
+        With ``etags`` enabled, 200 GET responses the preconditions don't
+        give an ETag for get a hash of their content instead (which only
+        saves sending the content again).
+        """
+        etag = self.get_etag(request, *args, **kwargs)
+        last_modified = self.get_last_modified(request, *args, **kwargs)
+
+        if etag is not None:
+            etag = self.get_variant_etag(request, etag)
+
+        if last_modified is not None:
+            last_modified = calendar.timegm(last_modified.utctimetuple())
+
+        if self.is_not_modified(request, etag, last_modified):
+            response = cake_http.HttpNotModified()
+        else:
+            response = create_response(request, *args, **kwargs)
+
+            if not isinstance(response, cake_http.HttpResponse) or \
+                    response.status_code != 200:
+                return response
+
+            if etag is None and self._meta.etags and \
+                    request.method == 'GET':
+                if response.has_header('ETag'):
+                    etag = parse_etags(response['ETag'])[0]
+                else:
+                    etag = md5(response.content).hexdigest()
+
+                if self.is_not_modified(request, etag, last_modified):
+                    response = cake_http.HttpNotModified()
+
+        if etag is not None:
+            response['ETag'] = quote_etag(etag)
+
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+
+        patch_vary_headers(response, ('Accept',))
+
+        return response
+
     def dispatch_any(self, request, handler, *args, **kwargs):
         """
         Hook for custom exception handling
@@ -255,13 +502,57 @@ class Resource(View):
         return response
 
     def process_body(self, request):
+        """
+        Sets ``request.DATA`` up to hold the deserialized request body.
+
+        Nothing is read or deserialized until ``request.DATA`` is first used,
+        so handlers that don't need the body don't pay for it.  Handlers that
+        need the deserialized object itself (e.g. to pass it to
+        ``json.dumps``) can get it with ``unwrap_data(request.DATA)``.
+        """
+        request.DATA = LazyData(lambda: self.load_body(request))
+
+    def load_body(self, request):
+        """
+        Reads & deserializes the request body for ``request.DATA``, after
+        checking it against ``max_body_size``.
+        """
+        max_body_size = self._meta.max_body_size
+
+        # Don't even read bodies that say they're too big.
+        self.check_content_length(request)
+
         # Deprecated, use request.body going forward
-        if request.raw_post_data:
-            request.DATA = self.deserialize(
-                request, request.raw_post_data,
-                format=request.META.get('CONTENT_TYPE', 'application/json'))
-        else:
-            request.DATA = {}
+        body = request.raw_post_data
+
+        if max_body_size is not None and len(body) > max_body_size:
+            raise ImmediateHttpResponse(
+                response_cls=cake_http.HttpRequestEntityTooLarge)
+
+        if not body:
+            return {}
+
+        return self.deserialize(
+            request, body,
+            format=request.META.get('CONTENT_TYPE', 'application/json'))
+
+    def check_content_length(self, request):
+        """
+        Raises a 413 if the request's ``Content-Length`` is over
+        ``max_body_size``.  Returns the ``Content-Length`` (0 if missing).
+        """
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+
+        max_body_size = self._meta.max_body_size
+
+        if max_body_size is not None and content_length > max_body_size:
+            raise ImmediateHttpResponse(
+                response_cls=cake_http.HttpRequestEntityTooLarge)
+
+        return content_length
 
     def determine_format(self, request):
         return determine_format(
@@ -320,6 +611,26 @@ class Resource(View):
 
         return self._meta.include_entity
 
+    def get_sparse_entity_cls(self, request, entity_cls):
+        """
+        With ``sparse_fieldsets`` enabled, returns ``entity_cls`` restricted
+        to the fields asked for by the request's ``fields`` & ``exclude``
+        parameters (see ``Entity.restrict``).  Unknown fields get a 400.
+        """
+        if not self._meta.sparse_fieldsets or entity_cls is None:
+            return entity_cls
+
+        fields, exclude = [
+            [name.strip() for name in request.GET.get(param, '').split(',')
+             if name.strip()] for param in ('fields', 'exclude')]
+
+        try:
+            return entity_cls.restrict(fields or None, exclude or None)
+        except InvalidFieldsError, e:
+            self.raise_coded_error(request, 'INVALID_FIELDS', dict(
+                (field_name, [u'No such field.'])
+                for field_name in e.field_names))
+
     def get_http_response_details(self, resource_response, entity,
                                   include_entity, default_response_cls,
                                   default_response_kwargs):
@@ -338,6 +649,10 @@ class Resource(View):
 
         return response_cls, response_kwargs
 
+    def _has_http_response_processor(self, request):
+        return hasattr(self, 'process_http_response') or hasattr(
+            self, 'process_http_response_%s' % request.method.lower())
+
     def _process_http_response(self, request, http_response, obj):
         if hasattr(self, 'process_http_response'):
             self.process_http_response(http_response, obj)
@@ -358,8 +673,9 @@ class Resource(View):
         include_entity = self._get_include_entity(
             resource_response, force_include_entity)
 
-        entity_cls = resource_response.get_entity_cls(
-            self._meta.get_detail_entity_cls())
+        entity_cls = self.get_sparse_entity_cls(
+            request, resource_response.get_entity_cls(
+                self._meta.get_detail_entity_cls()))
 
         if resource_response.obj is None:
             if created or include_entity:
@@ -387,7 +703,8 @@ class Resource(View):
         desired_format = self.determine_format(request)
 
         content = '' if entity is None or include_entity is False else \
-            self.serialize(request, entity.full_process(), desired_format)
+            self.serialize(request, self.process_objects(
+                entity_cls, (resource_response.obj,))[0], desired_format)
 
         http_response = http_response_cls(
             content=content, content_type=build_content_type(desired_format),
@@ -397,6 +714,17 @@ class Resource(View):
 
         return http_response
 
+    def process_objects(self, entity_cls, objects):
+        """
+        Processes ``objects`` with ``entity_cls`` (see
+        ``Entity.process_many``), for this resource's serializer if the
+        entity is in wire mode.
+        """
+        if entity_cls.wire:
+            return entity_cls.process_many(objects, self._meta.serializer)
+
+        return entity_cls.process_many(objects)
+
     def head_impl(self, request, *args, **kwargs):
         if hasattr(self, 'get'):
             return self.get(request, *args, **kwargs)
@@ -406,11 +734,20 @@ class DetailResource(Resource):
     __metaclass__ = DetailResourceMetaClass
 
     def dispatch_get(self, request, *args, **kwargs):
+        return self.dispatch_conditional(
+            functools.partial(self.dispatch_cached, self.create_get_response),
+            request, *args, **kwargs)
+
+    def create_get_response(self, request, *args, **kwargs):
         return self.create_http_response(request,
             self.dispatch_method(self.get, request, *args, **kwargs),
             force_include_entity=True)
 
     def dispatch_head(self, request, *args, **kwargs):
+        return self.dispatch_conditional(
+            self.create_head_response, request, *args, **kwargs)
+
+    def create_head_response(self, request, *args, **kwargs):
         return self.create_http_response(request,
             self.dispatch_method(self.head, request, *args, **kwargs),
             default_response_cls=cake_http.HttpResponse,
@@ -424,15 +761,45 @@ class DetailResource(Resource):
             self.dispatch_method(self.delete, request, *args, **kwargs))
 
 
+class LimitedBodyReader(object):
+    """
+    Reads from ``stream`` (the request), raising a 413 once more than
+    ``max_size`` bytes have been read.
+    """
+    def __init__(self, stream, max_size):
+        self.stream = stream
+        self.max_size = max_size
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.size += len(data)
+
+        if self.size > self.max_size:
+            raise ImmediateHttpResponse(
+                response_cls=cake_http.HttpRequestEntityTooLarge)
+
+        return data
+
+
 class ListResource(Resource):
     __metaclass__ = ListResourceMetaClass
 
     def dispatch_get(self, request, *args, **kwargs):
+        return self.dispatch_conditional(
+            functools.partial(self.dispatch_cached, self.create_get_response),
+            request, *args, **kwargs)
+
+    def create_get_response(self, request, *args, **kwargs):
         return self.create_http_list_response(
             request, self.dispatch_method(self.get, request, *args, **kwargs),
             paginated=True, force_include_entity=True)
 
     def dispatch_head(self, request, *args, **kwargs):
+        return self.dispatch_conditional(
+            self.create_head_response, request, *args, **kwargs)
+
+    def create_head_response(self, request, *args, **kwargs):
         return self.create_http_list_response(request,
             self.dispatch_method(self.head, request, *args, **kwargs),
             paginated=True, force_include_entity=False,
@@ -446,6 +813,40 @@ class ListResource(Resource):
         return self.create_http_list_response(request,
             self.dispatch_method(self.delete, request, *args, **kwargs))
 
+    def process_body(self, request):
+        """
+        With ``stream_body`` on, bulk PUTs & POSTs in a format that can be
+        read incrementally get an iterator over the collection's items as
+        ``request.DATA`` (see ``stream_body``), instead of the whole
+        deserialized body.
+        """
+        if self._meta.stream_body and request.method in ('POST', 'PUT'):
+            method = self._meta.serializer.get_deserialize_stream_method(
+                request.META.get('CONTENT_TYPE', 'application/json'))
+
+            if method is not None:
+                request.DATA = self.stream_body(request, method)
+                return
+
+        super(ListResource, self).process_body(request)
+
+    def stream_body(self, request, method):
+        """
+        Returns an iterator over the items of the request body, read with the
+        serializer's ``from_<format>_stream`` ``method``.  Nothing is read
+        until the first item is asked for.
+        """
+        if not self.check_content_length(request) and \
+                'CONTENT_LENGTH' in request.META:
+            return iter(())
+
+        stream = request
+
+        if self._meta.max_body_size is not None:
+            stream = LimitedBodyReader(request, self._meta.max_body_size)
+
+        return method(stream, self._meta.collection_name)
+
     def create_http_list_response(self, request, resource_response,
                                   paginated=False, force_include_entity=None,
                                   default_response_cls=None,
@@ -456,8 +857,9 @@ class ListResource(Resource):
         include_entity = self._get_include_entity(
             resource_response, force_include_entity)
 
-        entity_cls = resource_response.get_entity_cls(
+        full_entity_cls = resource_response.get_entity_cls(
             self._meta.get_detail_entity_cls())
+        entity_cls = self.get_sparse_entity_cls(request, full_entity_cls)
 
         if entity_cls is None and include_entity:
             raise ResourceEntityError(
@@ -473,11 +875,25 @@ class ListResource(Resource):
         else:
             entities = obj
 
+        projection = None
+
+        if include_entity:
+            projection = self.get_projection(entity_cls, entities)
+
+            if projection is not None:
+                entities = projection.apply(entities)
+            else:
+                entities = self.add_related_lookups(entity_cls, entities)
+
+                if entity_cls is not full_entity_cls:
+                    entities = self.only_columns(entity_cls, entities)
+
         if paginated:
             paginator = self._meta.paginator_cls(
                 request.GET, entities, resource_uri=self.get_resource_uri(),
                 limit=self._meta.limit, max_limit=self._meta.max_limit,
-                collection_name=self._meta.collection_name)
+                collection_name=self._meta.collection_name,
+                **self.get_count_kwargs())
 
             page = paginator.page()
             entities = page[self._meta.collection_name]
@@ -492,10 +908,43 @@ class ListResource(Resource):
 
         desired_format = self.determine_format(request)
 
+        stream_method = None
+
+        # ``process_http_response`` hooks are handed the processed entities,
+        # which only exist while a streamed body is written, so resources
+        # with hooks are never streamed.
+        if include_entity and http_response_cls is cake_http.HttpResponse \
+                and not http_response_kwargs and \
+                self._get_stream(resource_response) and \
+                not self._has_http_response_processor(request):
+            stream_method = self._meta.serializer.get_stream_method(
+                desired_format)
+
+        if stream_method is not None:
+            page[self._meta.collection_name] = self.iter_processed_entities(
+                entity_cls, entities, projection)
+
+            content = stream_method(page, self._meta.collection_name)
+
+            # Process the first chunk and serialize its first entity before
+            # the response is committed, so errors there (the query, the
+            # entity, ...) still go through ``handle_exception``.  Errors
+            # after that can only cut the body short.
+            head = list(itertools.islice(content, 2))
+
+            return cake_http.StreamingHttpResponse(
+                itertools.chain(head, content),
+                content_type=build_content_type(desired_format))
+
         if include_entity:
-            entities = [entity_cls(obj).full_process() for obj in entities]
+            if projection is not None:
+                entities = projection.rows(entities)
+
+            entities = self.process_objects(entity_cls, entities)
             page[self._meta.collection_name] = entities
-            content = self.serialize(request, page, desired_format)
+            content = self.serialize(request, page, desired_format, {
+                'collection_name': self._meta.collection_name,
+                'field_names': sorted(entity_cls.base_fields)})
         else:
             content = ''
             entities = None
@@ -508,6 +957,118 @@ class ListResource(Resource):
 
         return http_response
 
+    def get_count_kwargs(self):
+        """
+        Returns the counting options (``count_strategy`` and friends) the
+        resource sets, for the paginator.  Those left alone aren't passed,
+        so paginators that don't take them keep working.
+        """
+        kwargs = {}
+
+        for name in ('count_strategy', 'count_cache_timeout',
+                     'max_exact_count'):
+            value = getattr(self._meta, name)
+
+            if value != getattr(ListResourceOptions, name):
+                kwargs[name] = value
+
+        return kwargs
+
+    def _get_stream(self, resource_response):
+        if resource_response.stream is not None:
+            return resource_response.stream
+
+        return self._meta.stream
+
+    def iter_processed_entities(self, entity_cls, objects, projection=None):
+        """
+        Yields the processed entities for ``objects``, ``stream_chunk_size``
+        objects at a time, without holding on to the objects already done.
+        """
+        # ``iterator`` skips the queryset's result cache, but also any
+        # ``prefetch_related`` lookups, which need the whole result set.
+        if isinstance(objects, QuerySet) and \
+                not objects._prefetch_related_lookups:
+            objects = objects.iterator()
+        else:
+            objects = iter(objects)
+
+        chunk_size = self._meta.stream_chunk_size
+
+        while True:
+            chunk = list(itertools.islice(objects, chunk_size))
+
+            if not chunk:
+                break
+
+            if projection is not None:
+                chunk = projection.rows(chunk)
+
+            for entity in self.process_objects(entity_cls, chunk):
+                yield entity
+
+    def get_projection(self, entity_cls, objects):
+        """
+        Returns the ``QuerySetProjection`` used to load ``objects`` for
+        ``entity_cls``, or ``None`` to load them as they are.
+
+        Only used when ``project_fields`` is enabled and ``objects`` is a
+        model ``QuerySet``.  The paginator's ``ordering`` (if it has one)
+        is always loaded too.
+        """
+        if not self._meta.project_fields or not is_queryset(objects):
+            return None
+
+        paths = entity_cls.get_attribute_paths()
+
+        if paths is None:
+            return None
+
+        return QuerySetProjection.for_model(
+            objects.model, paths,
+            ordering=getattr(self._meta.paginator_cls, 'ordering', ()))
+
+    def only_columns(self, entity_cls, objects):
+        """
+        Returns ``objects`` restricted (with ``only``) to the columns
+        ``entity_cls`` reads, if it's a model ``QuerySet`` and the columns
+        are known.  Used for sparse fieldsets.
+
+        Relations followed with ``select_related`` can't be deferred, so
+        they're always loaded.
+        """
+        if not is_queryset(objects) or objects.query.select_related is True:
+            return objects
+
+        paths = entity_cls.get_attribute_paths()
+
+        if paths is None:
+            return objects
+
+        columns = get_columns(objects.model, paths)
+
+        if columns is None:
+            return objects
+
+        if objects.query.select_related:
+            columns.extend(
+                name for name in sorted(objects.query.select_related)
+                if name not in columns)
+
+        return objects.only(*columns)
+
+    def add_related_lookups(self, entity_cls, objects):
+        """
+        Returns ``objects`` with the ``select_related``/``prefetch_related``
+        lookups needed by ``entity_cls`` added, if it's a model ``QuerySet``
+        and ``infer_related`` is enabled.
+        """
+        if not self._meta.infer_related or not is_queryset(objects):
+            return objects
+
+        return add_related_lookups(
+            objects, entity_cls.get_attribute_paths(strict=False))
+
     def get_resource_uri(self):
         raise NotImplementedError
 
@@ -5,8 +5,9 @@ __all__ = ('ResourceResponse',)
 
 class ResourceResponse(object):
     def __init__(self, obj=None, entity_cls=None, include_entity=None,
-                 response_cls=None, response_kwargs=None):
+                 response_cls=None, response_kwargs=None, stream=None):
         self.obj = obj
+        self.stream = stream
 
         self.entity_cls = entity_cls
         self.include_entity = include_entity
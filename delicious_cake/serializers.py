@@ -1,11 +1,8 @@
 import datetime
 from StringIO import StringIO
 
-import django
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
-from django.core.serializers import json
-from django.utils import simplejson
 from django.utils.encoding import force_unicode
 
 from delicious_cake.exceptions import (
@@ -14,6 +11,10 @@ from delicious_cake.exceptions import (
 
 from delicious_cake.utils import (
     format_datetime, format_date, format_time, make_naive)
+from delicious_cake.utils.mime import negotiated_formats
+from delicious_cake.utils.json_backend import get_json_backend
+from delicious_cake.utils.json_stream import (
+    iter_json_items, JSON_STREAM_ERRORS,)
 
 try:
     import lxml
@@ -60,6 +61,11 @@ if yaml is not None:
             Resolver.__init__(self)
 
 
+# Types every JSON backend encodes natively (see ``Serializer.to_json``).
+JSON_NATIVE_TYPES = (
+    basestring, bool, int, long, float, list, tuple, dict, type(None),)
+
+
 class Serializer(object):
     """
     A swappable class for serialization.
@@ -72,12 +78,13 @@ class Serializer(object):
         * yaml
         * html
         * plist (see http://explorapp.com/biplist/)
+        * columns (JSON, with collections as rows of values)
 
     It was designed to make changing behavior easy, either by overridding the
     various format methods (i.e. ``to_json``), by changing the
     ``formats/content_types`` options or by altering the other hook methods.
     """
-    formats = ['json', 'jsonp', 'xml', 'yaml', 'html', 'plist']
+    formats = ['json', 'jsonp', 'xml', 'yaml', 'html', 'plist', 'columns']
     content_types = {
         'json': 'application/json',
         'jsonp': 'text/javascript',
@@ -85,11 +92,21 @@ class Serializer(object):
         'yaml': 'text/yaml',
         'html': 'text/html',
         'plist': 'application/x-plist',
+        'columns': 'application/vnd.cake.columns+json',
     }
 
-    def __init__(self, formats=None, content_types=None, datetime_formatting=None):
+    def __init__(self, formats=None, content_types=None, datetime_formatting=None, json_backend=None):
         self.supported_formats = []
         self.datetime_formatting = getattr(settings, 'DELICIOUS_CAKE_DATETIME_FORMATTING', 'iso-8601')
+        self.json_backend = get_json_backend(json_backend)
+
+        # Unless ``to_simple`` has been customized, it only needs to see what
+        # the JSON backend can't encode by itself.
+        self.simplify_json_natively = self.json_backend.handles_default and \
+            self.to_simple.im_func is Serializer.to_simple.im_func
+
+        self.simple_converters = self.build_simple_converters()
+        self.simple_converter_cache = {}
 
         if formats is not None:
             self.formats = formats
@@ -106,6 +123,73 @@ class Serializer(object):
             except KeyError:
                 raise UnsupportedFormat("Content type for specified type '%s' not found. Please provide it at either the class level or via the arguments." % format)
 
+        self.build_format_tables()
+
+    def build_format_tables(self):
+        """
+        Maps each MIME type in ``content_types`` to the bound methods that
+        handle it (``to_<format>``, ``from_<format>`` &
+        ``to_<format>_stream`` & ``from_<format>_stream``), so
+        ``serialize``/``deserialize`` don't have to search for them on every
+        call.
+        """
+        self.serialize_methods = {}
+        self.deserialize_methods = {}
+        self.stream_methods = {}
+        self.deserialize_stream_methods = {}
+
+        for short_format, long_format in self.content_types.items():
+            for table, name in (
+                    (self.serialize_methods, 'to_%s'),
+                    (self.deserialize_methods, 'from_%s'),
+                    (self.stream_methods, 'to_%s_stream'),
+                    (self.deserialize_stream_methods, 'from_%s_stream')):
+                method = getattr(self, name % short_format, None)
+
+                if method is not None:
+                    table.setdefault(long_format, method)
+
+    def register_format(self, format, content_type, supported=True):
+        """
+        Adds a format (handled by ``to_<format>``/``from_<format>`` methods)
+        to this serializer.  With ``supported=False`` it's only used when the
+        request explicitly asks for it, not for content negotiation.
+        """
+        self.content_types = dict(self.content_types)
+        self.content_types[format] = content_type
+
+        if supported and format not in self.formats:
+            self.formats = list(self.formats) + [format]
+            self.supported_formats.append(content_type)
+
+        self.build_format_tables()
+
+        # Earlier negotiation results don't know about the new format.
+        negotiated_formats.clear()
+
+    def get_stream_method(self, format):
+        """
+        Given a MIME type, returns the method that serializes a collection
+        piece by piece in that format (``to_<format>_stream``), or ``None``
+        if the format can't be streamed.
+        """
+        return self.stream_methods.get(format)
+
+    def get_deserialize_stream_method(self, format):
+        """
+        Given a MIME type, returns the method that reads the items of a
+        collection one at a time from a file-like object in that format
+        (``from_<format>_stream``), or ``None`` if the format can't be read
+        that way.
+        """
+        method = self.deserialize_stream_methods.get(format)
+
+        if method is None:
+            method = self.deserialize_stream_methods.get(
+                format.partition(';')[0].strip())
+
+        return method
+
     def get_mime_for_format(self, format):
         """
         Given a format, attempts to determine the correct MIME type.
@@ -166,20 +250,13 @@ class Serializer(object):
         Given some data and a format, calls the correct method to serialize
         the data and returns the result.
         """
-        desired_format = None
-
-        for short_format, long_format in self.content_types.items():
-            if format == long_format:
-                if hasattr(self, "to_%s" % short_format):
-                    desired_format = short_format
-                    break
+        method = self.serialize_methods.get(format)
 
-        if desired_format is None:
+        if method is None:
             raise UnsupportedSerializationFormat("The format indicated '%s' had no available serialization method. Please check your ``formats`` and ``content_types`` on your Serializer." % format)
 
         try:
-            serialized = \
-                getattr(self, "to_%s" % desired_format)(bundle, options)
+            serialized = method(bundle, options)
         except UnsupportedSerializationFormat, e:
             raise
         except Exception, e:
@@ -192,21 +269,18 @@ class Serializer(object):
         Given some data and a format, calls the correct method to deserialize
         the data and returns the result.
         """
-        desired_format = None
+        method = self.deserialize_methods.get(format)
 
-        format = format.split(';')[0]
+        if method is None:
+            # Drop any parameters (``; charset=utf-8``) and try again.
+            format = format.partition(';')[0].strip()
+            method = self.deserialize_methods.get(format)
 
-        for short_format, long_format in self.content_types.items():
-            if format == long_format:
-                if hasattr(self, "from_%s" % short_format):
-                    desired_format = short_format
-                    break
-
-        if desired_format is None:
+        if method is None:
             raise UnsupportedDeserializationFormat("The format indicated '%s' had no available deserialization method. Please check your ``formats`` and ``content_types`` on your Serializer." % format)
 
         try:
-            deserialized = getattr(self, "from_%s" % desired_format)(content)
+            deserialized = method(content)
         except UnsupportedDeserializationFormat, e:
             raise
         except Exception, e:
@@ -214,32 +288,131 @@ class Serializer(object):
 
         return deserialized
 
+    def build_simple_converters(self):
+        """
+        Returns the ``to_simple`` converters, a ``{type: converter}`` mapping
+        where a converter is a ``converter(data, options)`` callable (or
+        ``None`` for types that are left as they are).
+
+        Override (or use ``register_simple_converter``) to handle other types.
+        """
+        return {
+            list: self.simple_list,
+            tuple: self.simple_list,
+            dict: self.simple_dict,
+            datetime.datetime: lambda data, options: self.format_datetime(data),
+            datetime.date: lambda data, options: self.format_date(data),
+            datetime.time: lambda data, options: self.format_time(data),
+            unicode: None,
+            bool: None,
+            int: None,
+            long: None,
+            float: None,
+            type(None): None,
+        }
+
+    def register_simple_converter(self, types, converter):
+        """
+        Makes ``to_simple`` use ``converter(data, options)`` for instances of
+        ``types`` (a type or a tuple of types) and their subclasses, e.g.
+        ``serializer.register_simple_converter(uuid.UUID, lambda data,
+        options: data.hex)``.
+        """
+        if not isinstance(types, tuple):
+            types = (types,)
+
+        for data_type in types:
+            self.simple_converters[data_type] = converter
+
+            # The JSON backends encode these themselves, so everything has to
+            # go through ``to_simple`` for the converter to be used.
+            if issubclass(data_type, JSON_NATIVE_TYPES):
+                self.simplify_json_natively = False
+
+        self.simple_converter_cache.clear()
+
+    def get_simple_converter(self, data_type):
+        """
+        Finds the converter for ``data_type`` (or its closest registered base
+        class) and caches it.  Unknown types are turned into unicode.
+        """
+        converter = self.simple_fallback
+
+        for base in getattr(data_type, '__mro__', ()):
+            if base in self.simple_converters:
+                converter = self.simple_converters[base]
+                break
+
+        self.simple_converter_cache[data_type] = converter
+        return converter
+
+    def simple_fallback(self, data, options):
+        return force_unicode(data)
+
+    def simple_list(self, data, options):
+        to_simple = self.to_simple
+        simple = None
+
+        for index, item in enumerate(data):
+            simple_item = to_simple(item, options)
+
+            # Only copy the list once something in it changes.
+            if simple is None:
+                if simple_item is item:
+                    continue
+
+                simple = list(data[:index])
+
+            simple.append(simple_item)
+
+        if simple is not None:
+            return simple
+
+        # Tuples (and list subclasses) still need to become plain lists.
+        return data if type(data) is list else list(data)
+
+    def simple_dict(self, data, options):
+        to_simple = self.to_simple
+        simple = None
+
+        for key, val in data.iteritems():
+            simple_val = to_simple(val, options)
+
+            # Only copy the dict once something in it changes.
+            if simple is None:
+                if simple_val is val:
+                    continue
+
+                simple = dict(data)
+
+            simple[key] = simple_val
+
+        if simple is not None:
+            return simple
+
+        # ``dict`` subclasses (``SortedDict``, ...) become plain dicts, which
+        # every serializer understands.
+        return data if type(data) is dict else dict(data)
+
     def to_simple(self, data, options):
         """
         For a piece of data, attempts to recognize it and provide a simplified
         form of something complex.
 
         This brings complex Python data structures down to native types of the
-        serialization format(s).
+        serialization format(s).  Values of native types are returned as they
+        are; everything else is handled by the converter registered for its
+        type (see ``register_simple_converter``).
         """
-        if isinstance(data, (list, tuple)):
-            return [self.to_simple(item, options) for item in data]
-        if isinstance(data, dict):
-            return dict((key, self.to_simple(val, options)) for (key, val) in data.iteritems())
-        elif isinstance(data, datetime.datetime):
-            return self.format_datetime(data)
-        elif isinstance(data, datetime.date):
-            return self.format_date(data)
-        elif isinstance(data, datetime.time):
-            return self.format_time(data)
-        elif isinstance(data, bool):
-            return data
-        elif type(data) in (long, int, float):
+        try:
+            converter = self.simple_converter_cache[type(data)]
+        except KeyError:
+            converter = self.get_simple_converter(type(data))
+
+        if converter is None:
             return data
-        elif data is None:
-            return None
-        else:
-            return force_unicode(data)
+
+        return converter(data, options)
 
     def to_etree(self, data, options=None, name=None, depth=0):
         """
@@ -318,20 +491,127 @@ class Serializer(object):
         Given some Python data, produces JSON output.
         """
         options = options or {}
-        data = self.to_simple(data, options)
-
         sort_keys = settings.DEBUG
 
-        if django.get_version() >= '1.5':
-            return json.json.dumps(data, cls=json.DjangoJSONEncoder, sort_keys=sort_keys, ensure_ascii=False)
-        else:
-            return simplejson.dumps(data, cls=json.DjangoJSONEncoder, sort_keys=sort_keys, ensure_ascii=False)
+        if self.simplify_json_natively:
+            # Only what the backend can't encode goes through ``to_simple``.
+            try:
+                return self.json_backend.dumps(
+                    data, default=lambda value: self.to_simple(value, options),
+                    sort_keys=sort_keys)
+            except UnicodeDecodeError:
+                # Non-ASCII bytestrings mixed with unicode; ``to_simple``
+                # decodes them.
+                pass
+
+        return self.json_backend.dumps(
+            self.to_simple(data, options), sort_keys=sort_keys)
+
+    def to_json_stream(self, data, collection_name, options=None):
+        """
+        Given a ``dict`` whose ``collection_name`` item is an iterable of
+        objects, produces JSON output piece by piece.
+
+        The collection is serialized one object at a time as it is iterated,
+        followed by the rest of ``data`` (e.g. the pagination ``meta``), so
+        only one object needs to be held in memory at once.
+        """
+        options = options or {}
+
+        yield u'{%s: [' % self.to_json(collection_name, options)
+
+        for index, obj in enumerate(data[collection_name]):
+            if index:
+                yield u', '
+
+            yield self.to_json(obj, options)
+
+        yield u']'
+
+        for key, value in data.items():
+            if key != collection_name:
+                yield u', %s: %s' % (
+                    self.to_json(key, options), self.to_json(value, options))
+
+        yield u'}'
+
+    def to_columns(self, data, options=None):
+        """
+        Given a ``dict`` whose ``collection_name`` item is a list of objects,
+        produces JSON output with the objects given as a header of field
+        names and rows of values in the same order, rather than repeating
+        every key in every object::
+
+            {"objects": {"fields": ["message", "resource_id"],
+                         "rows": [["Cake 1", 1], ["Cake 2", 2]]},
+             "meta": {...}}
+
+        The header starts with ``field_names`` (the entity's fields, when a
+        resource is serializing), followed by any other keys the objects
+        have.  Anything else is plain JSON.
+        """
+        options = options or {}
+        collection_name = options.get('collection_name', 'objects')
+        objects = data.get(collection_name) if isinstance(data, dict) \
+            else None
+
+        if not isinstance(objects, (list, tuple)) or \
+                not all(isinstance(obj, dict) for obj in objects):
+            return self.to_json(data, options)
+
+        field_names = list(options.get('field_names', ()))
+        extra_names = set()
+
+        for obj in objects:
+            extra_names.update(obj)
+
+        field_names.extend(sorted(extra_names.difference(field_names)))
+
+        columns = dict(data)
+        columns[collection_name] = {
+            'fields': field_names,
+            'rows': [[obj.get(field_name) for field_name in field_names]
+                     for obj in objects]}
+
+        return self.to_json(columns, options)
+
+    def from_columns(self, content):
+        """
+        Given JSON data produced by ``to_columns``, returns the decoded data
+        with any collection (an item of a top-level object that holds just a
+        ``fields`` header and ``rows``) turned back into a list of dicts.
+        """
+        data = self.from_json(content)
+
+        if not isinstance(data, dict):
+            return data
+
+        for key, value in data.items():
+            if isinstance(value, dict) and \
+                    sorted(value) == ['fields', 'rows']:
+                field_names = value['fields']
+                data[key] = [dict(zip(field_names, row))
+                             for row in value['rows']]
+
+        return data
 
     def from_json(self, content):
         """
         Given some JSON data, returns a Python dictionary of the decoded data.
         """
-        return simplejson.loads(content)
+        return self.json_backend.loads(content)
+
+    def from_json_stream(self, stream, collection_name=None):
+        """
+        Given a file-like object holding a JSON array (or an object with the
+        array under ``collection_name``), yields the decoded items one at a
+        time as they are read.
+        """
+        try:
+            for item in iter_json_items(stream, collection_name):
+                yield item
+        except JSON_STREAM_ERRORS, e:
+            raise BadRequest()
 
     def to_jsonp(self, data, options=None):
         """
@@ -2,6 +2,7 @@ import time
 from urlparse import urlparse
 
 from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.test import TestCase
 from django.test.client import FakePayload, Client
 from delicious_cake.serializers import Serializer
@@ -244,6 +245,31 @@ class TestApiClient(object):
         return self.client.delete(uri, **kwargs)
 
 
+class _AssertMaxQueriesContext(object):
+    def __init__(self, test_case, num, connection):
+        self.test_case = test_case
+        self.num = num
+        self.connection = connection
+
+    def __enter__(self):
+        self.old_debug_cursor = self.connection.use_debug_cursor
+        self.connection.use_debug_cursor = True
+        self.starting_queries = len(self.connection.queries)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.connection.use_debug_cursor = self.old_debug_cursor
+
+        if exc_type is not None:
+            return
+
+        executed = len(self.connection.queries) - self.starting_queries
+
+        self.test_case.assertTrue(
+            executed <= self.num, "%d queries executed, at most %d expected" % (
+                executed, self.num))
+
+
 class ResourceTestCase(TestCase):
     """
     A useful base class for the start of testing Delicious Cake APIs.
@@ -419,6 +445,12 @@ class ResourceTestCase(TestCase):
         """
         return self.assertEqual(resp.status_code, 410)
 
+    def assertHttpRequestEntityTooLarge(self, resp):
+        """
+        Ensures the response is returning a HTTP 413.
+        """
+        return self.assertEqual(resp.status_code, 413)
+
     def assertHttpTooManyRequests(self, resp):
         """
         Ensures the response is returning a HTTP 429.
@@ -528,8 +560,14 @@ class ResourceTestCase(TestCase):
         that.
 
         It returns a Python datastructure (typically a ``dict``) of the serialized data.
+        Streaming responses are consumed in the process.
         """
-        return self.serializer.deserialize(resp.content, format=resp['Content-Type'])
+        if getattr(resp, 'streaming', False):
+            content = ''.join(resp.streaming_content)
+        else:
+            content = resp.content
+
+        return self.serializer.deserialize(content, format=resp['Content-Type'])
 
     def serialize(self, data, format='application/json'):
         """
@@ -538,6 +576,26 @@ class ResourceTestCase(TestCase):
         """
         return self.serializer.serialize(data, format=format)
 
+    def assertMaxQueries(self, num, func=None, *args, **kwargs):
+        """
+        Ensures that no more than ``num`` database queries are executed.
+
+        Works like Django's ``assertNumQueries``: call it with a callable (and
+        its arguments) or use it as a context manager. Useful for making sure
+        list resources don't fall back to a query per object::
+
+            with self.assertMaxQueries(3):
+                self.api_client.get('/api/v1/entry/', data={'limit': 50})
+        """
+        using = kwargs.pop('using', DEFAULT_DB_ALIAS)
+        context = _AssertMaxQueriesContext(self, num, connections[using])
+
+        if func is None:
+            return context
+
+        with context:
+            func(*args, **kwargs)
+
     def assertKeys(self, data, expected):
         """
         This method ensures that the keys of the ``data`` match up to the keys of
@@ -1,5 +1,15 @@
+import os
 import time
+import atexit
+import logging
+import threading
+import collections
+
 from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+
+log = logging.getLogger('delicious_cake.throttle')
 
 
 class BaseThrottle(object):
@@ -106,6 +116,135 @@ class CacheThrottle(BaseThrottle):
         cache.set(key, times_accessed, self.expiration)
 
 
+class AccessLogBuffer(object):
+    """
+    Buffers ``ApiAccess`` records in process and writes them to the database
+    in batches (``bulk_create``) from a background thread.
+
+    The thread wakes up every ``flush_interval`` seconds, or as soon as
+    ``batch_size`` records are waiting. At most ``max_buffer`` records are
+    held; beyond that, ``drop_policy`` decides whether the ``oldest`` or the
+    ``newest`` record is dropped. Whatever is left is flushed when the
+    process exits.
+    """
+    DROP_OLDEST = 'oldest'
+    DROP_NEWEST = 'newest'
+
+    def __init__(self, batch_size=100, flush_interval=5, max_buffer=10000,
+                 drop_policy=DROP_OLDEST):
+        if drop_policy not in (self.DROP_OLDEST, self.DROP_NEWEST):
+            raise ImproperlyConfigured(
+                "Unknown drop policy '%s'. Please use '%s' or '%s'." % (
+                    drop_policy, self.DROP_OLDEST, self.DROP_NEWEST))
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.drop_policy = drop_policy
+
+        self.dropped = 0
+        self.records = collections.deque()
+        self.lock = threading.Lock()
+        # Notified (under ``lock``) when a batch is ready or on ``close``.
+        self.wakeup = threading.Condition(self.lock)
+        self.thread = None
+        self.pid = None
+        self.stopped = False
+
+        atexit.register(self.close)
+
+    def add(self, record):
+        with self.lock:
+            if len(self.records) >= self.max_buffer:
+                self.dropped += 1
+
+                if self.drop_policy == self.DROP_NEWEST:
+                    return
+
+                self.records.popleft()
+
+            self.records.append(record)
+
+            if len(self.records) >= self.batch_size:
+                self.wakeup.notify()
+
+        self.ensure_thread()
+
+    def ensure_thread(self):
+        # Threads don't survive a fork (e.g. gunicorn's ``--preload``), so
+        # each process starts its own.
+        if self.pid == os.getpid() and self.thread is not None and \
+                self.thread.is_alive():
+            return
+
+        with self.lock:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.thread = None
+
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='delicious-cake-access-log')
+                self.thread.daemon = True
+                self.thread.start()
+
+    def run(self):
+        from django.db import connection
+
+        while True:
+            with self.lock:
+                # Checked under the lock, so a batch that fills up (or a
+                # ``close``) before the wait begins isn't missed.
+                if not self.stopped and len(self.records) < self.batch_size:
+                    self.wakeup.wait(self.flush_interval)
+
+                stopped = self.stopped
+
+            if stopped:
+                break
+
+            try:
+                self.flush()
+            finally:
+                # Don't hold a connection open between flushes.
+                connection.close()
+
+    def close(self):
+        """
+        Stops the background thread and flushes what's left.  Called when the
+        process exits.
+        """
+        with self.lock:
+            self.stopped = True
+            self.wakeup.notify()
+
+        if self.thread is not None and self.pid == os.getpid():
+            self.thread.join(self.flush_interval)
+
+        self.flush()
+
+    def flush(self):
+        """
+        Writes every buffered record to the database, ``batch_size`` at a
+        time.
+        """
+        from delicious_cake.models import ApiAccess
+
+        while True:
+            with self.lock:
+                batch = [self.records.popleft() for i in range(
+                    min(self.batch_size, len(self.records)))]
+
+            if not batch:
+                break
+
+            try:
+                ApiAccess.objects.bulk_create(batch)
+            except Exception:
+                log.exception(
+                    'Could not write %d API access records.' % len(batch))
+
+
 class CacheDBThrottle(CacheThrottle):
     """
     A throttling mechanism that uses the cache for actual throttling but
@@ -113,7 +252,30 @@ class CacheDBThrottle(CacheThrottle):
 
     This is useful for tracking/aggregating usage through time, to possibly
     build a statistics interface or a billing mechanism.
+
+    Accepts the ``BaseThrottle`` kwargs, plus::
+
+        * ``write_behind`` - buffer the database writes and make them in
+          batches from a background thread (see ``AccessLogBuffer``) rather
+          than during the request. Default is ``False``.
+        * ``batch_size``, ``flush_interval``, ``max_buffer`` &
+          ``drop_policy`` - passed on to the ``AccessLogBuffer`` when
+          ``write_behind`` is on.
     """
+    def __init__(self, throttle_at=150, timeframe=3600, expiration=None,
+                 write_behind=False, batch_size=100, flush_interval=5,
+                 max_buffer=10000, drop_policy=AccessLogBuffer.DROP_OLDEST):
+        super(CacheDBThrottle, self).__init__(
+            throttle_at=throttle_at, timeframe=timeframe,
+            expiration=expiration)
+
+        self.buffer = None
+
+        if write_behind:
+            self.buffer = AccessLogBuffer(
+                batch_size=batch_size, flush_interval=flush_interval,
+                max_buffer=max_buffer, drop_policy=drop_policy)
+
     def accessed(self, identifier, **kwargs):
         """
         Handles recording the user's access.
@@ -125,8 +287,76 @@ class CacheDBThrottle(CacheThrottle):
         # only required when using this throttling mechanism.
         from delicious_cake.models import ApiAccess
         super(CacheDBThrottle, self).accessed(identifier, **kwargs)
+
+        if self.buffer is not None:
+            # ``bulk_create`` skips ``save``, so set the time up front.
+            self.buffer.add(ApiAccess(
+                identifier=identifier,
+                url=kwargs.get('url', ''),
+                request_method=kwargs.get('request_method', ''),
+                accessed=int(time.time())))
+            return
+
         # Write out the access to the DB for logging purposes.
         ApiAccess.objects.create(
             identifier=identifier,
             url=kwargs.get('url', ''),
             request_method=kwargs.get('request_method', ''))
+
+    def flush(self):
+        """
+        Writes out any buffered access records now.
+        """
+        if self.buffer is not None:
+            self.buffer.flush()
+
+
+class CacheCounterThrottle(BaseThrottle):
+    """
+    A throttling mechanism that uses fixed-window counters in the cache.
+
+    Each ``timeframe``-long window gets its own counter, which is
+    incremented atomically (``cache.incr``) as the request is checked, so
+    concurrent workers can't lose each other's updates and the cache only
+    ever holds a single number per user. Checking a request usually takes a
+    single cache round trip; ``accessed`` has nothing left to do.
+
+    As with any fixed window, a user can make up to twice ``throttle_at``
+    requests across the boundary between two windows.
+    """
+    def get_window_key(self, identifier, now=None):
+        if now is None:
+            now = time.time()
+
+        window = int(now) // int(self.timeframe)
+        return "%s_%d" % (self.convert_identifier_to_key(identifier), window)
+
+    def should_be_throttled(self, identifier, **kwargs):
+        """
+        Counts the request and returns whether or not the user has exceeded
+        their throttle limit for the current window.
+
+        Returns ``False`` if the user should NOT be throttled or ``True`` if
+        the user should be throttled.
+        """
+        key = self.get_window_key(identifier)
+
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # First request in this window. If another worker beats us to
+            # creating the counter, count against theirs instead.
+            if cache.add(key, 1, int(self.timeframe)):
+                count = 1
+            else:
+                count = cache.incr(key)
+
+        return count > int(self.throttle_at)
+
+    def accessed(self, identifier, **kwargs):
+        """
+        Handles recording the user's access.
+
+        Does nothing, as ``should_be_throttled`` has already counted it.
+        """
+        pass
@@ -1,4 +1,8 @@
 from .mime import *
 from .formatting import *
+from .json_backend import *
+from .json_stream import *
+from .lazy import *
+from .lru import *
 from .timezone import *
 from .validate_jsonp import *
@@ -0,0 +1,116 @@
+import logging
+
+from django.conf import settings
+from django.utils.importlib import import_module
+
+__all__ = ('JSONBackend', 'SimpleJSONBackend', 'UltraJSONBackend',
+           'get_json_backend',)
+
+
+log = logging.getLogger('delicious_cake.utils.json_backend')
+
+
+class JSONBackend(object):
+    """
+    Wraps a JSON library for ``Serializer.to_json``/``from_json``.
+
+    ``dumps`` returns unicode.  Backends with ``handles_default`` set encode
+    the native JSON types themselves and pass everything else (datetimes,
+    ``Decimal``\s, lazy translations, ...) to ``default``, so the serializer
+    doesn't need to walk the data with ``to_simple`` beforehand.
+
+    This one uses the standard library's ``json``.  Bytestrings are
+    written as they are, so mixing non-ASCII ones with unicode raises
+    ``UnicodeDecodeError`` (see ``Serializer.to_json``).
+    """
+    module_name = 'json'
+    handles_default = True
+
+    def __init__(self):
+        self.module = import_module(self.module_name)
+
+    def dumps(self, data, default=None, sort_keys=False):
+        dumped = self.module.dumps(
+            data, default=default, sort_keys=sort_keys, ensure_ascii=False)
+
+        # With ``ensure_ascii=False`` you get a ``str`` back if the data
+        # happened to be all ASCII.
+        if isinstance(dumped, str):
+            return dumped.decode('utf-8')
+
+        return dumped
+
+    def loads(self, content):
+        return self.module.loads(content)
+
+
+class SimpleJSONBackend(JSONBackend):
+    module_name = 'simplejson'
+
+
+class UltraJSONBackend(JSONBackend):
+    # ``ujson`` can't fall back on a ``default`` function, so the data still
+    # gets simplified first.
+    module_name = 'ujson'
+    handles_default = False
+
+    # ``ujson``'s defaults cut floats down to 10 decimals and escape every
+    # ``/``; write them like the standard library does instead (as far as
+    # ``ujson`` allows: before 2.0 it stops at 15 significant digits).
+    double_precision = 15
+
+    def dumps(self, data, default=None, sort_keys=False):
+        dumped = self.module.dumps(
+            data, sort_keys=sort_keys, ensure_ascii=False,
+            double_precision=self.double_precision,
+            escape_forward_slashes=False)
+
+        if isinstance(dumped, str):
+            return dumped.decode('utf-8')
+
+        return dumped
+
+
+BACKENDS = {
+    'json': JSONBackend,
+    'simplejson': SimpleJSONBackend,
+    'ujson': UltraJSONBackend,
+}
+
+_backends = {}
+
+
+def get_json_backend(name=None):
+    """
+    Returns the (shared) ``JSONBackend`` called ``name``, which is either one
+    of ``json``, ``simplejson`` & ``ujson`` or the dotted path to a
+    ``JSONBackend`` subclass.
+
+    Defaults to ``settings.DELICIOUS_CAKE_JSON_BACKEND`` (or ``json``).  If
+    the library isn't installed, the standard library's ``json`` is used
+    instead.
+    """
+    if name is None:
+        name = getattr(settings, 'DELICIOUS_CAKE_JSON_BACKEND', 'json')
+
+    try:
+        return _backends[name]
+    except KeyError:
+        pass
+
+    try:
+        backend_cls = BACKENDS.get(name)
+
+        if backend_cls is None:
+            module_name, cls_name = name.rsplit('.', 1)
+            backend_cls = getattr(import_module(module_name), cls_name)
+
+        backend = backend_cls()
+    except (ImportError, AttributeError, ValueError), e:
+        log.warning(
+            "JSON backend '%s' isn't available (%s), using 'json'." % (
+                name, e))
+        backend = JSONBackend()
+
+    _backends[name] = backend
+    return backend
@@ -0,0 +1,214 @@
+import re
+import json
+import codecs
+
+try:
+    import ijson
+    from ijson.common import JSONError
+except ImportError:
+    ijson = None
+    JSONError = ValueError
+
+# Earlier versions only give ``Decimal``s for non-integer numbers (and
+# their C backends can crash on bad input), so stick to the fallback.
+if ijson is not None and tuple(map(int, re.findall(
+        r'\d+', ijson.__version__)[:2])) < (3, 1):
+    ijson = None
+
+__all__ = ('JSONItemParser', 'iter_json_items', 'JSON_STREAM_ERRORS',)
+
+
+# What ``iter_json_items`` raises for bad JSON.
+JSON_STREAM_ERRORS = (ValueError, JSONError,)
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER = re.compile(r'[-+.eE0-9]*')
+NUMBER_START = u'-0123456789'
+
+
+class JSONItemParser(object):
+    """
+    Reads the items of a JSON array from a file-like ``stream`` one at a
+    time, reading ``chunk_size`` bytes at once, so only the item being
+    decoded (rather than the whole document) is held in memory.
+
+    The array is either the whole document or, given a ``collection_name``,
+    that member of a top-level object (``{"objects": [...]}``); any other
+    members are decoded and thrown away.
+
+    This is the pure-Python fallback for ``iter_json_items``, built on the
+    standard library's ``JSONDecoder.raw_decode``.
+    """
+    def __init__(self, stream, collection_name=None, chunk_size=65536):
+        self.stream = stream
+        self.collection_name = collection_name
+        self.chunk_size = chunk_size
+
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = u''
+        self.pos = 0
+        self.eof = False
+
+    def __iter__(self):
+        char = self.skip_whitespace()
+
+        if char == u'[':
+            self.pos += 1
+
+            for item in self.iter_array():
+                yield item
+        elif char == u'{' and self.collection_name is not None:
+            self.pos += 1
+
+            for item in self.iter_object():
+                yield item
+        else:
+            raise ValueError('Expected a JSON array.')
+
+        if self.skip_whitespace() is not None:
+            raise ValueError('Extra data after the JSON document.')
+
+    def fill(self):
+        """Reads another chunk into the buffer; ``False`` at the end."""
+        if self.eof:
+            return False
+
+        chunk = self.stream.read(self.chunk_size)
+        self.eof = not chunk
+
+        # Drop what has already been parsed.
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(
+            chunk, final=self.eof)
+        self.pos = 0
+
+        return not self.eof
+
+    def skip_whitespace(self):
+        """
+        Moves past any whitespace and returns the next character, or ``None``
+        at the end of the stream.
+        """
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+
+            if not self.fill():
+                return None
+
+    def expect(self, chars):
+        char = self.skip_whitespace()
+
+        if char is None or char not in chars:
+            raise ValueError('Expected one of %r, got %r.' % (chars, char))
+
+        self.pos += 1
+        return char
+
+    def decode_value(self):
+        char = self.skip_whitespace()
+
+        # ``raw_decode`` happily stops a number short (``1.`` is ``1``), so
+        # make sure the whole of it is in the buffer first.
+        if char is not None and char in NUMBER_START:
+            while NUMBER.match(self.buffer, self.pos).end() == \
+                    len(self.buffer) and self.fill():
+                pass
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                # Probably cut off at the end of the buffer.
+                if not self.fill():
+                    raise
+
+                continue
+
+            self.pos = end
+            return value
+
+    def iter_array(self):
+        if self.skip_whitespace() == u']':
+            self.pos += 1
+            return
+
+        while True:
+            yield self.decode_value()
+
+            if self.expect(u',]') == u']':
+                return
+
+    def iter_object(self):
+        if self.skip_whitespace() == u'}':
+            self.pos += 1
+            return
+
+        while True:
+            key = self.decode_value()
+            self.expect(u':')
+
+            if key == self.collection_name:
+                self.expect(u'[')
+
+                for item in self.iter_array():
+                    yield item
+            else:
+                self.decode_value()
+
+            if self.expect(u',}') == u'}':
+                return
+
+
+class PrefixedReader(object):
+    """Puts ``prefix`` back in front of what's left of ``stream``."""
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.stream.read(size)
+
+        if size is None or size < 0:
+            data, self.prefix = self.prefix + self.stream.read(), ''
+            return data
+
+        data, self.prefix = self.prefix[:size], self.prefix[size:]
+        return data
+
+
+def iter_json_items(stream, collection_name=None, chunk_size=65536):
+    """
+    Returns an iterator over the items of the JSON array read from the
+    file-like ``stream`` (see ``JSONItemParser``), using ``ijson`` (3.1 or
+    later) if it's installed.
+
+    Without ``ijson``, nothing is read until the first item is asked for.
+    With it, the first chunk (or more, if it's all whitespace) is read
+    straight away to find out how the array is laid out, so a document that
+    isn't an array is rejected here rather than when iterating.
+    """
+    if ijson is None:
+        return iter(JSONItemParser(stream, collection_name, chunk_size))
+
+    # Find out whether it's a bare array or an object holding one.
+    first = stream.read(chunk_size)
+    stripped = first.lstrip()
+
+    while first and not stripped:
+        first = stream.read(chunk_size)
+        stripped = first.lstrip()
+
+    stream = PrefixedReader(stripped, stream)
+
+    if stripped[:1] == '[':
+        prefix = 'item'
+    elif stripped[:1] == '{' and collection_name is not None:
+        prefix = '%s.item' % collection_name
+    else:
+        raise ValueError('Expected a JSON array.')
+
+    return ijson.items(stream, prefix, use_float=True)
@@ -0,0 +1,39 @@
+import operator
+
+from django.utils.functional import SimpleLazyObject, empty, new_method_proxy
+
+__all__ = ('LazyData', 'unwrap_data',)
+
+
+class LazyData(SimpleLazyObject):
+    """
+    A ``SimpleLazyObject`` that also passes the container protocols on, so it
+    can stand in for deserialized data (a ``dict``, ``list``, ...) until the
+    data is first used.
+
+    It's still a proxy though, not the data itself: anything that checks the
+    exact type (``json.dumps``, ``type(data) is dict``, C extensions, ...)
+    needs the real object, which ``unwrap_data`` gives.
+    """
+    __getitem__ = new_method_proxy(operator.getitem)
+    __setitem__ = new_method_proxy(operator.setitem)
+    __delitem__ = new_method_proxy(operator.delitem)
+    __contains__ = new_method_proxy(operator.contains)
+    __iter__ = new_method_proxy(iter)
+    __len__ = new_method_proxy(len)
+    __ne__ = new_method_proxy(operator.ne)
+    __repr__ = new_method_proxy(repr)
+
+
+def unwrap_data(data):
+    """
+    Returns the object a ``LazyData`` stands in for, deserializing it first if
+    that hasn't happened yet.  Anything else is returned as is.
+    """
+    if isinstance(data, LazyData):
+        if data._wrapped is empty:
+            data._setup()
+
+        return data._wrapped
+
+    return data
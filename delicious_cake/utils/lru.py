@@ -0,0 +1,41 @@
+import threading
+import collections
+
+__all__ = ('LRUCache',)
+
+
+class LRUCache(object):
+    """
+    A small, thread-safe, in-process mapping that holds on to the
+    ``maxsize`` most recently used keys.
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.data = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                value = self.data.pop(key)
+            except KeyError:
+                return default
+
+            # Move it to the most recently used end.
+            self.data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data.pop(key, None)
+            self.data[key] = value
+
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
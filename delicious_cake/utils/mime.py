@@ -1,6 +1,17 @@
 import mimeparse
 
-__all__ = ('determine_format', 'build_content_type',)
+from django.conf import settings
+
+from .lru import LRUCache
+
+__all__ = ('determine_format', 'negotiate_format', 'build_content_type',)
+
+
+# Negotiated mime types, keyed by ``(Accept header, format param, serializer,
+# default format)``.  Clients tend to send a handful of distinct ``Accept``
+# headers, so this stays small and nearly every lookup is a hit.
+negotiated_formats = LRUCache(
+    getattr(settings, 'DELICIOUS_CAKE_FORMAT_CACHE_SIZE', 256))
 
 
 def determine_format(request, serializer, default_format='application/json'):
@@ -16,20 +27,46 @@ def determine_format(request, serializer, default_format='application/json'):
     If still no format is found, returns the ``default_format`` (which defaults
     to ``application/json`` if not provided).
     """
+    key = (request.META.get('HTTP_ACCEPT', '*/*'),
+           request.GET.get('format'), serializer, default_format)
+
+    # The result is memoized on the request (many things want it while
+    # building a response), and shared between requests through
+    # ``negotiated_formats``.
+    memo = getattr(request, '_negotiated_format', None)
+
+    if memo is not None and memo[0] == key:
+        return memo[1]
+
+    desired_format = negotiated_formats.get(key)
+
+    if desired_format is None:
+        desired_format = negotiate_format(*key)
+        negotiated_formats.set(key, desired_format)
+
+    request._negotiated_format = (key, desired_format)
+    return desired_format
+
+
+def negotiate_format(accept, format, serializer,
+                     default_format='application/json'):
+    """
+    Does the work for ``determine_format``, given the ``Accept`` header and
+    the ``format`` parameter rather than the request.
+    """
     # First, check if they forced the format.
-    if request.GET.get('format'):
-        if request.GET['format'] in serializer.formats:
-            return serializer.get_mime_for_format(request.GET['format'])
+    if format:
+        if format in serializer.formats:
+            return serializer.get_mime_for_format(format)
 
     # Try to fallback on the Accepts header.
-    if request.META.get('HTTP_ACCEPT', '*/*') != '*/*':
+    if accept != '*/*':
         formats = list(serializer.supported_formats) or []
         # Reverse the list, because mimeparse is weird like that. See also
         # https://github.com/toastdriven/django-tastypie/issues#issue/12 for
         # more information.
         formats.reverse()
-        best_format = mimeparse.best_match(
-            formats, request.META['HTTP_ACCEPT'])
+        best_format = mimeparse.best_match(formats, accept)
 
         if best_format:
             return best_format
@@ -0,0 +1,63 @@
+"""
+Size & encode time of a page of 1,000 processed entities as plain JSON and
+as the columnar format (``application/vnd.cake.columns+json``).
+
+Run from the ``test`` directory::
+
+    PYTHONPATH=.:.. python benchmarks/bench_columns.py
+"""
+import os
+import timeit
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from delicious_cake.serializers import Serializer
+
+
+ROWS = 1000
+REPEAT = 5
+NUMBER = 10
+
+FIELD_NAMES = [
+    'baked', 'cake_type', 'is_fresh', 'message', 'price', 'resource_id']
+
+
+def make_page():
+    return {
+        'meta': {
+            'limit': ROWS, 'offset': 0, 'total_count': ROWS,
+            'previous': None, 'next': u'/cakes/?offset=%d' % ROWS},
+        'objects': [{
+            'resource_id': pk,
+            'resource_uri': u'/cakes/%d/' % pk,
+            'message': u'Cake %s' % pk,
+            'cake_type': u'Birthday',
+            'price': u'12.50',
+            'baked': u'2012-12-21T12:00:00',
+            'is_fresh': True,
+        } for pk in range(ROWS)]}
+
+
+def page_msec(serialize):
+    best = min(timeit.repeat(serialize, repeat=REPEAT, number=NUMBER))
+    return best / NUMBER * 1e3
+
+
+def main():
+    serializer = Serializer()
+    page = make_page()
+    options = {'collection_name': 'objects', 'field_names': FIELD_NAMES}
+
+    formats = (
+        ('json', lambda: serializer.to_json(page, options)),
+        ('columns', lambda: serializer.to_columns(page, options)),)
+
+    print '%d entities per page' % ROWS
+
+    for label, serialize in formats:
+        print '  %-8s %8d bytes %8.2f msec/page' % (
+            label, len(serialize().encode('utf-8')), page_msec(serialize))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Per-row cost of ``Entity.full_process``.
+
+Compares the precompiled field plan (per object and through the batched
+``Entity.process_many``) against the previous implementation, which
+deepcopied ``base_fields`` and resolved every hook per instance.
+
+Run from the ``test`` directory::
+
+    PYTHONPATH=.:.. python benchmarks/bench_entities.py
+"""
+import os
+import timeit
+import datetime
+from copy import deepcopy
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from delicious_cake import fields
+from delicious_cake.entities import Entity
+
+
+ROWS = 100
+REPEAT = 5
+NUMBER = 20
+
+
+class Flavor(object):
+    name = u'Chocolate'
+    intensity = 7
+
+
+class Cake(object):
+    def __init__(self, pk):
+        self.pk = pk
+        self.message = u'Cake %s' % pk
+        self.cake_type = pk % 3 + 1
+        self.price = '12.50'
+        self.baked = datetime.datetime(2012, 12, 21, 12, 0, 0)
+        self.flavor = Flavor()
+
+
+class FlavorEntity(Entity):
+    name = fields.CharField()
+    intensity = fields.IntegerField()
+
+
+class CakeEntity(Entity):
+    CAKE_TYPES = {1: u'Birthday', 2: u'Graduation', 3: u'Schadenfreude'}
+
+    resource_id = fields.IntegerField(attr='pk')
+    message = fields.CharField()
+    cake_type = fields.CharField()
+    price = fields.DecimalField()
+    baked = fields.DateTimeField()
+    flavor_name = fields.CharField(attr='flavor__name')
+    flavor = fields.EntityField(FlavorEntity)
+
+    def process_cake_type(self, cake_type):
+        return self.CAKE_TYPES.get(cake_type, u'Unknown')
+
+
+class LegacyEntityMixin(object):
+    """The pre-field-plan ``Entity`` behavior, kept here for comparison."""
+    def __init__(self, obj):
+        self.obj = obj
+        self.fields = deepcopy(self.base_fields)
+
+    def full_process(self):
+        processed_data = {}
+
+        for field_name, field_object in self.fields.items():
+            processed_field_data = field_object.process(self.obj)
+
+            method = getattr(self, 'process_%s' % field_name, None)
+
+            if method:
+                if field_object.attribute is None:
+                    processed_field_data = method(self.obj)
+                else:
+                    processed_field_data = method(processed_field_data)
+
+            if processed_field_data is None and field_object.has_default:
+                processed_field_data = field_object.default
+
+            if processed_field_data is not None:
+                processed_field_data = \
+                    field_object.convert(processed_field_data)
+
+            processed_data[field_name] = processed_field_data
+
+        return self.process(processed_data)
+
+
+class LegacyFlavorEntity(LegacyEntityMixin, FlavorEntity):
+    pass
+
+
+class LegacyCakeEntity(LegacyEntityMixin, CakeEntity):
+    flavor = fields.EntityField(LegacyFlavorEntity)
+
+
+def per_row_usec(entity_cls, objects):
+    def run():
+        for obj in objects:
+            entity_cls(obj).full_process()
+
+    best = min(timeit.repeat(run, repeat=REPEAT, number=NUMBER))
+    return best / (NUMBER * len(objects)) * 1e6
+
+
+def process_many_per_row_usec(entity_cls, objects):
+    def run():
+        entity_cls.process_many(objects)
+
+    best = min(timeit.repeat(run, repeat=REPEAT, number=NUMBER))
+    return best / (NUMBER * len(objects)) * 1e6
+
+
+def main():
+    objects = [Cake(pk) for pk in range(ROWS)]
+
+    before = per_row_usec(LegacyCakeEntity, objects)
+    after = per_row_usec(CakeEntity, objects)
+    batched = process_many_per_row_usec(CakeEntity, objects)
+
+    print 'Entity.full_process, %d rows per page' % ROWS
+    print '  before (deepcopy per row): %8.2f usec/row' % before
+    print '  after  (field plan):       %8.2f usec/row' % after
+    print '  after  (process_many):     %8.2f usec/row' % batched
+    print '  speedup:                   %8.2fx' % (before / batched)
+
+
+if __name__ == '__main__':
+    main()
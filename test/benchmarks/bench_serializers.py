@@ -0,0 +1,95 @@
+"""
+Cost of ``Serializer.to_simple`` over a page of 1,000 processed entities.
+
+Compares the type-dispatch table against the previous implementation, a
+chain of ``isinstance`` checks that rebuilt every list and dict.
+
+Run from the ``test`` directory::
+
+    PYTHONPATH=.:.. python benchmarks/bench_serializers.py
+"""
+import os
+import timeit
+import datetime
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from django.utils.encoding import force_unicode
+
+from delicious_cake.serializers import Serializer
+
+
+ROWS = 1000
+REPEAT = 5
+NUMBER = 10
+
+
+class LegacySerializer(Serializer):
+    """The pre-dispatch-table ``to_simple``, kept here for comparison."""
+    def to_simple(self, data, options):
+        if isinstance(data, (list, tuple)):
+            return [self.to_simple(item, options) for item in data]
+        if isinstance(data, dict):
+            return dict((key, self.to_simple(val, options)) for (key, val) in data.iteritems())
+        elif isinstance(data, datetime.datetime):
+            return self.format_datetime(data)
+        elif isinstance(data, datetime.date):
+            return self.format_date(data)
+        elif isinstance(data, datetime.time):
+            return self.format_time(data)
+        elif isinstance(data, bool):
+            return data
+        elif type(data) in (long, int, float):
+            return data
+        elif data is None:
+            return None
+        else:
+            return force_unicode(data)
+
+
+def make_page(baked):
+    return {
+        'meta': {
+            'limit': ROWS, 'offset': 0, 'total_count': ROWS,
+            'previous': None, 'next': u'/cakes/?offset=%d' % ROWS},
+        'objects': [{
+            'resource_id': pk,
+            'resource_uri': u'/cakes/%d/' % pk,
+            'message': u'Cake %s' % pk,
+            'cake_type': u'Birthday',
+            'price': u'12.50',
+            'baked': baked,
+            'is_fresh': True,
+            'flavor': {'name': u'Chocolate', 'intensity': 7},
+        } for pk in range(ROWS)]}
+
+
+def page_msec(serializer, page):
+    def run():
+        serializer.to_simple(page, {})
+
+    best = min(timeit.repeat(run, repeat=REPEAT, number=NUMBER))
+    return best / NUMBER * 1e3
+
+
+def main():
+    # Processed entities already hold native values, except for dates and
+    # times when they're left to the serializer.
+    native_page = make_page(u'2012-12-21T12:00:00')
+    datetime_page = make_page(datetime.datetime(2012, 12, 21, 12, 0, 0))
+
+    print 'Serializer.to_simple, %d entities per page' % ROWS
+
+    for label, page in (('native', native_page),
+                        ('datetimes', datetime_page)):
+        before = page_msec(LegacySerializer(), page)
+        after = page_msec(Serializer(), page)
+
+        print '  %s:' % label
+        print '    before (isinstance chain): %8.2f msec/page' % before
+        print '    after  (dispatch table):   %8.2f msec/page' % after
+        print '    speedup:                   %8.2fx' % (before / after)
+
+
+if __name__ == '__main__':
+    main()
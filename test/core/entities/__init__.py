@@ -1 +1,2 @@
 from .cake import *
+from .pastry import *
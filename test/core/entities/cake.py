@@ -11,6 +11,9 @@ __all__ = ('CakeListEntity', 'CakeDetailEntity')
 
 
 class CakeEntity(Entity):
+    # ``get_resource_uri`` only needs the primary key.
+    required_attributes = ()
+
     @models.permalink
     def get_resource_uri(self):
         return ('simple-detail', (self.obj.pk,))
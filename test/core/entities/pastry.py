@@ -0,0 +1,15 @@
+from delicious_cake import fields
+from delicious_cake.entities import Entity
+
+__all__ = ('BakeryEntity', 'PastryEntity',)
+
+
+class BakeryEntity(Entity):
+    name = fields.CharField()
+    pastry_count = fields.IntegerField(attr='pastries__count')
+
+
+class PastryEntity(Entity):
+    name = fields.CharField()
+    bakery = fields.EntityField(BakeryEntity)
+    toppings = fields.ListField(attr='toppings__all')
@@ -23,3 +23,20 @@ class Cake(models.Model):
     def __init__(self, *args, **kwargs):
         self.nested_time = TimeClass()
         super(Cake, self).__init__(*args, **kwargs)
+
+
+class Bakery(models.Model):
+    name = models.CharField(max_length=64)
+
+
+class Topping(models.Model):
+    name = models.CharField(max_length=64)
+
+    def __unicode__(self):
+        return self.name
+
+
+class Pastry(models.Model):
+    name = models.CharField(max_length=64)
+    bakery = models.ForeignKey(Bakery, related_name='pastries')
+    toppings = models.ManyToManyField(Topping, related_name='pastries')
@@ -1,6 +1,7 @@
 from .resource_base import *
 from .resource_empty import *
 from .resource_simple import *
+from .resource_related import *
 from .resource_upload import *
 from .resource_custom_entity import *
 from .resource_custom_create import *
@@ -0,0 +1,42 @@
+from django.db import models
+
+from delicious_cake.resources import ListResource
+
+from core.models import Pastry
+from core.entities import PastryEntity
+
+__all__ = ('PastryListResource', 'SparsePastryListResource',
+           'SelectRelatedPastryListResource',)
+
+
+class PastryListResource(ListResource):
+    def get(self, request, *args, **kwargs):
+        return Pastry.objects.order_by('pk')
+
+    @models.permalink
+    def get_resource_uri(self):
+        return ('pastry-list',)
+
+    class Meta(object):
+        entity_cls = PastryEntity
+        infer_related = True
+
+
+class SparsePastryListResource(PastryListResource):
+    @models.permalink
+    def get_resource_uri(self):
+        return ('sparse-pastry-list',)
+
+    class Meta(object):
+        entity_cls = PastryEntity
+        infer_related = True
+        sparse_fieldsets = True
+
+
+class SelectRelatedPastryListResource(SparsePastryListResource):
+    def get(self, request, *args, **kwargs):
+        return Pastry.objects.select_related('bakery').order_by('pk')
+
+    @models.permalink
+    def get_resource_uri(self):
+        return ('select-related-pastry-list',)
@@ -1,19 +1,34 @@
+import datetime
+
 from django.db import models
 
 import delicious_cake.http as cake_http
 
+from delicious_cake.queries import get_version
 from delicious_cake.response import ResourceResponse
+from delicious_cake.paginators import Paginator, CursorPaginator
 
 from delicious_cake.throttle import CacheDBThrottle
 from delicious_cake.authentication import (
     BasicAuthentication, MultiAuthentication, ApiKeyAuthentication,)
 
+from core.models import Cake
+from core.forms import CakeForm
 from core.entities import CakeDetailEntity, CakeListEntity
+from delicious_cake.exceptions import BadRequest
 from core.resources import BaseListResource, BaseDetailResource
 
 __all__ = ('SimpleDetailResource', 'SimpleListResource',
            'BareSimpleListResource', 'BareSimpleDetailResource',
-           'ForcedSimpleDetailResource', 'ForcedSimpleListResource',)
+           'ForcedSimpleDetailResource', 'ForcedSimpleListResource',
+           'ProjectedSimpleListResource', 'StreamedSimpleListResource',
+           'CursorSimpleListResource', 'LimitedSimpleListResource',
+           'ImportSimpleListResource', 'CachedSimpleDetailResource',
+           'CachedSimpleListResource', 'ConditionalSimpleDetailResource',
+           'ConditionalSimpleListResource', 'BrokenStreamedListResource',
+           'HookedStreamedListResource', 'BasicPaginatorSimpleListResource',
+           'ProjectedCursorSimpleListResource',
+           'AuthenticatedCachedSimpleListResource',)
 
 
 class SimpleDetailResource(BaseDetailResource):
@@ -170,3 +185,192 @@ class BareSimpleListResource(BaseListResource):
         include_entity = True
         list_entity_cls = CakeListEntity
         detail_entity_cls = CakeDetailEntity
+
+
+class ProjectedSimpleListResource(SimpleListResource):
+    @models.permalink
+    def get_resource_uri(self):
+        return ('projected-simple-list',)
+
+    class Meta(object):
+        include_entity = True
+        project_fields = True
+        list_entity_cls = CakeListEntity
+        detail_entity_cls = CakeDetailEntity
+
+
+class StreamedSimpleListResource(SimpleListResource):
+    @models.permalink
+    def get_resource_uri(self):
+        return ('streamed-simple-list',)
+
+    class Meta(object):
+        include_entity = True
+        stream = True
+        stream_chunk_size = 7
+        list_entity_cls = CakeListEntity
+        detail_entity_cls = CakeDetailEntity
+
+
+class BrokenCakeListEntity(CakeListEntity):
+    def process_cake_type(self, cake_type):
+        raise BadRequest('Broken cake.')
+
+
+class BrokenStreamedListResource(StreamedSimpleListResource):
+    class Meta(object):
+        include_entity = True
+        stream = True
+        list_entity_cls = BrokenCakeListEntity
+        detail_entity_cls = BrokenCakeListEntity
+
+
+class HookedStreamedListResource(StreamedSimpleListResource):
+    def process_http_response(self, http_response, entities):
+        http_response['X-Cake-Types'] = u','.join(
+            sorted(set(entity['cake_type'] for entity in entities)))
+
+
+class BasicPaginator(Paginator):
+    # Doesn't know about the counting options.
+    def __init__(self, request_data, objects, resource_uri=None, limit=None,
+                 offset=0, max_limit=100, collection_name='objects'):
+        super(BasicPaginator, self).__init__(
+            request_data, objects, resource_uri=resource_uri, limit=limit,
+            offset=offset, max_limit=max_limit,
+            collection_name=collection_name)
+
+
+class BasicPaginatorSimpleListResource(SimpleListResource):
+    @models.permalink
+    def get_resource_uri(self):
+        return ('basic-paginator-simple-list',)
+
+    class Meta(object):
+        include_entity = True
+        paginator_cls = BasicPaginator
+        list_entity_cls = CakeListEntity
+        detail_entity_cls = CakeDetailEntity
+
+
+class CakeCursorPaginator(CursorPaginator):
+    ordering = ('-cake_type', 'pk')
+
+
+class CursorSimpleListResource(SimpleListResource):
+    @models.permalink
+    def get_resource_uri(self):
+        return ('cursor-simple-list',)
+
+    class Meta(object):
+        include_entity = True
+        paginator_cls = CakeCursorPaginator
+        list_entity_cls = CakeListEntity
+        detail_entity_cls = CakeDetailEntity
+
+
+class MessageCursorPaginator(CursorPaginator):
+    # ``CakeListEntity`` doesn't read the message.
+    ordering = ('message', 'pk')
+
+
+class ProjectedCursorSimpleListResource(SimpleListResource):
+    @models.permalink
+    def get_resource_uri(self):
+        return ('projected-cursor-simple-list',)
+
+    class Meta(object):
+        include_entity = True
+        project_fields = True
+        paginator_cls = MessageCursorPaginator
+        entity_cls = CakeListEntity
+
+
+class LimitedSimpleListResource(SimpleListResource):
+    class Meta(object):
+        include_entity = True
+        list_entity_cls = CakeListEntity
+        detail_entity_cls = CakeDetailEntity
+
+        max_body_size = 128
+
+
+class ImportSimpleListResource(SimpleListResource):
+    def put(self, request, *args, **kwargs):
+        Cake.objects.all().delete()
+
+        cakes = []
+
+        # One cake at a time, as they're parsed.
+        for cake in request.DATA:
+            cake_form = CakeForm(cake)
+
+            if not cake_form.is_valid():
+                self.raise_http_error(request, 'Invalid Cake')
+
+            cakes.append(self._update_obj(Cake(), cake_form.cleaned_data))
+
+        return ResourceResponse(cakes)
+
+    class Meta(object):
+        include_entity = True
+        list_entity_cls = CakeListEntity
+        detail_entity_cls = CakeDetailEntity
+
+        stream_body = True
+        max_body_size = 1024
+
+
+class CachedSimpleDetailResource(SimpleDetailResource):
+    class Meta(object):
+        include_entity = True
+        detail_entity_cls = CakeDetailEntity
+
+        response_cache_timeout = 60
+        response_cache_models = (Cake,)
+
+
+class CachedSimpleListResource(SimpleListResource):
+    @models.permalink
+    def get_resource_uri(self):
+        return ('cached-simple-list',)
+
+    class Meta(object):
+        include_entity = True
+        list_entity_cls = CakeListEntity
+        detail_entity_cls = CakeDetailEntity
+
+        response_cache_timeout = 60
+        response_cache_per_identifier = True
+
+
+class AuthenticatedCachedSimpleListResource(CachedSimpleListResource):
+    class Meta(object):
+        include_entity = True
+        list_entity_cls = CakeListEntity
+        detail_entity_cls = CakeDetailEntity
+
+        authentication = BasicAuthentication()
+        response_cache_timeout = 60
+
+
+class ConditionalSimpleDetailResource(SimpleDetailResource):
+    class Meta(object):
+        include_entity = True
+        detail_entity_cls = CakeDetailEntity
+
+        etags = True
+
+
+class ConditionalSimpleListResource(SimpleListResource):
+    last_modified = datetime.datetime(2012, 12, 21, 12, 0, 0)
+
+    def get_etag(self, request, *args, **kwargs):
+        return '%s-%s' % get_version(Cake.objects.all())
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return self.last_modified
+
+    @models.permalink
+    def get_resource_uri(self):
+        return ('conditional-simple-list',)
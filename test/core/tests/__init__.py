@@ -1,4 +1,10 @@
+from .test_authentication import *
+from .test_entities import *
+from .test_paginators import *
 from .test_resource_base import *
 from .test_resource_empty import *
+from .test_resource_related import *
 from .test_resource_simple import *
 from .test_resource_unimplemented import *
+from .test_serializers import *
+from .test_throttle import *
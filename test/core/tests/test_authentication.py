@@ -0,0 +1,223 @@
+import time
+
+try:
+    import python_digest
+except ImportError:
+    python_digest = None
+
+from django.conf import settings
+from django.db import models
+from django.http import HttpRequest
+from django.test import TestCase
+from django.utils import unittest
+from django.core.cache import cache
+from django.contrib.auth.models import User
+
+from delicious_cake.models import ApiKey
+from delicious_cake.http import HttpUnauthorized
+from delicious_cake.authentication import (
+    ApiKeyAuthentication, BasicAuthentication, DigestAuthentication,
+    MultiAuthentication, partial_digests,)
+
+__all__ = ('ApiKeyAuthenticationTestCase', 'DigestAuthenticationTestCase',)
+
+
+class CountingApiKeyAuthentication(ApiKeyAuthentication):
+    extracted = 0
+
+    def extract_credentials(self, request):
+        self.extracted += 1
+        return super(
+            CountingApiKeyAuthentication, self).extract_credentials(request)
+
+
+class ApiKeyAuthenticationTestCase(TestCase):
+    def setUp(self):
+        super(ApiKeyAuthenticationTestCase, self).setUp()
+        cache.clear()
+
+        self.user = User.objects.create_user('johndoe', 'john@example.com')
+        self.api_key = ApiKey.objects.create(user=self.user)
+
+    def get_request(self, username='johndoe', api_key=None):
+        request = HttpRequest()
+        request.GET = {
+            'username': username, 'api_key': api_key or self.api_key.key}
+        return request
+
+    def test_is_authenticated(self):
+        auth = ApiKeyAuthentication()
+
+        request = self.get_request()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(auth.is_authenticated(request))
+
+        self.assertEqual(self.user, request.user)
+
+        self.assertTrue(isinstance(auth.is_authenticated(
+            self.get_request(username='janedoe')), HttpUnauthorized))
+        self.assertTrue(isinstance(auth.is_authenticated(
+            self.get_request(api_key='nope')), HttpUnauthorized))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(auth.is_authenticated(self.get_request()))
+
+    def test_is_authenticated_cached(self):
+        auth = ApiKeyAuthentication(cache_timeout=60)
+
+        self.assertTrue(auth.is_authenticated(self.get_request()))
+
+        request = self.get_request()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(auth.is_authenticated(request))
+
+        self.assertEqual(self.user, request.user)
+
+        # Changing the key drops the cached lookup for the old one.
+        old_key = self.api_key.key
+        self.api_key.key = self.api_key.generate_key()
+        self.api_key.save()
+
+        self.assertTrue(isinstance(auth.is_authenticated(
+            self.get_request(api_key=old_key)), HttpUnauthorized))
+        self.assertTrue(auth.is_authenticated(self.get_request()))
+
+        # As does deleting it.
+        self.api_key.delete()
+
+        self.assertTrue(isinstance(
+            auth.is_authenticated(self.get_request(api_key=self.api_key.key)),
+            HttpUnauthorized))
+
+    def test_is_authenticated_cached_during_save(self):
+        auth = ApiKeyAuthentication(cache_timeout=60)
+        old_key = self.api_key.key
+
+        # A request with the old key while the new one is being saved.
+        def authenticate(sender, instance, **kwargs):
+            self.assertTrue(auth.is_authenticated(
+                self.get_request(api_key=old_key)))
+
+        models.signals.pre_save.connect(authenticate, sender=ApiKey)
+
+        try:
+            self.api_key.key = self.api_key.generate_key()
+            self.api_key.save()
+        finally:
+            models.signals.pre_save.disconnect(authenticate, sender=ApiKey)
+
+        self.assertTrue(isinstance(auth.is_authenticated(
+            self.get_request(api_key=old_key)), HttpUnauthorized))
+        self.assertTrue(auth.is_authenticated(self.get_request()))
+
+    def test_identify(self):
+        auth = CountingApiKeyAuthentication()
+        request = self.get_request()
+
+        self.assertTrue(auth.is_authenticated(request))
+        self.assertEqual('johndoe', auth.identify(request))
+        self.assertEqual('johndoe', auth.identify(request))
+        self.assertEqual(1, auth.extracted)
+
+        # Through ``MultiAuthentication``, it's the backend that let the
+        # request in that identifies it.
+        auth = MultiAuthentication(
+            BasicAuthentication(), CountingApiKeyAuthentication())
+        request = self.get_request()
+
+        self.assertTrue(auth.is_authenticated(request))
+        self.assertEqual('johndoe', auth.identify(request))
+        self.assertEqual(1, auth.backends[1].extracted)
+
+        request = self.get_request(api_key='nope')
+        self.assertTrue(isinstance(
+            auth.is_authenticated(request), HttpUnauthorized))
+        self.assertEqual('nouser', auth.identify(request))
+
+        # Malformed credentials don't stop the request being identified.
+        request = HttpRequest()
+        request.META['HTTP_AUTHORIZATION'] = 'ApiKey johndoe'
+        self.assertEqual('nouser', ApiKeyAuthentication().identify(request))
+
+
+@unittest.skipIf(python_digest is None, 'python_digest is not installed')
+class DigestAuthenticationTestCase(TestCase):
+    def setUp(self):
+        super(DigestAuthenticationTestCase, self).setUp()
+        cache.clear()
+
+        self.user = User.objects.create_user('johndoe', 'john@example.com')
+        self.api_key = ApiKey.objects.create(user=self.user)
+        self.nonce = python_digest.calculate_nonce(
+            time.time(), settings.SECRET_KEY)
+
+    def get_request(self, nonce_count=1, api_key=None, nonce=None):
+        request = HttpRequest()
+        request.method = 'GET'
+        request.META['HTTP_AUTHORIZATION'] = \
+            python_digest.build_authorization_request(
+                'johndoe', 'GET', '/simple/', nonce_count,
+                realm='delicious-cake', nonce=nonce or self.nonce,
+                opaque='opaque', password=api_key or self.api_key.key)
+        return request
+
+    def test_is_authenticated_cached(self):
+        auth = DigestAuthentication(cache_timeout=60)
+
+        self.assertTrue(auth.is_authenticated(self.get_request()))
+
+        request = self.get_request(nonce_count=2)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(auth.is_authenticated(request))
+
+        self.assertEqual(self.user, request.user)
+
+        # The shared cache never holds the API key itself.
+        cached = cache.get(ApiKey.get_digest_cache_key('johndoe'))
+        self.assertEqual((self.user.pk, 'delicious-cake'), cached[:2])
+        self.assertFalse(self.api_key.key in repr(cached))
+        self.assertFalse(any(self.api_key.key in repr(key)
+                             for key in partial_digests.data))
+
+        # Changing the key drops the cached lookup.
+        old_key = self.api_key.key
+        self.api_key.key = self.api_key.generate_key()
+        self.api_key.save()
+
+        self.assertTrue(isinstance(auth.is_authenticated(
+            self.get_request(nonce_count=3, api_key=old_key)),
+            HttpUnauthorized))
+        self.assertTrue(auth.is_authenticated(
+            self.get_request(nonce_count=4)))
+
+    def test_nonce_replay(self):
+        auth = DigestAuthentication(nonce_timeout=60)
+
+        request = self.get_request()
+        self.assertTrue(auth.is_authenticated(request))
+
+        # The same request again is a replay...
+        self.assertTrue(isinstance(
+            auth.is_authenticated(self.get_request()), HttpUnauthorized))
+
+        # ...but the next nonce count is fine.
+        self.assertTrue(auth.is_authenticated(self.get_request(2)))
+
+        # Bad requests don't use nonce counts up.
+        self.assertTrue(isinstance(auth.is_authenticated(
+            self.get_request(3, api_key='nope')), HttpUnauthorized))
+        self.assertTrue(auth.is_authenticated(self.get_request(3)))
+
+        # Stale nonces are turned down.
+        nonce = python_digest.calculate_nonce(
+            time.time() - 120, settings.SECRET_KEY)
+        self.assertTrue(isinstance(auth.is_authenticated(
+            self.get_request(nonce=nonce)), HttpUnauthorized))
+
+        # Without a ``nonce_timeout``, nothing is tracked.
+        self.assertTrue(DigestAuthentication().is_authenticated(
+            self.get_request()))
@@ -0,0 +1,305 @@
+import decimal
+import datetime
+
+from django.test import TestCase
+from django.core.cache import cache
+
+from delicious_cake import fields
+from delicious_cake.entities import Entity
+from delicious_cake.queries import QuerySetProjection
+from delicious_cake.serializers import Serializer
+
+from core.models import Cake
+from core.entities import CakeListEntity, CakeDetailEntity
+
+__all__ = ('EntityTestCase',)
+
+
+class NestedTimeEntity(Entity):
+    nested_time = fields.DateTimeField(attr='nested_time__time')
+    missing = fields.CharField(attr='nested_time__missing', default=u'n/a')
+    shouted = fields.CharField()
+
+    def process_shouted(self, obj):
+        return obj.message.upper()
+
+
+class StaticHookEntity(Entity):
+    message = fields.CharField(attr='message')
+    cake_type = fields.CharField(attr='cake_type')
+
+    @staticmethod
+    def process_message(message):
+        return message.upper()
+
+    @classmethod
+    def process_cake_type(cls, cake_type):
+        return u'%s %s' % (cls.__name__, cake_type)
+
+
+class CakeTypeEntity(Entity):
+    resource_id = fields.IntegerField(attr='pk')
+    cake_type = fields.CharField(attr='cake_type')
+
+    def process_cake_type(self, cake_type):
+        return CakeListEntity.CAKE_TYPE_CHOICES_LOOKUP.get(
+            cake_type, 'Unknown')
+
+
+class PageLookupEntity(CakeTypeEntity):
+    def process_cake_type(self, cake_type):
+        return self.cake_types[cake_type]
+
+    @classmethod
+    def process_many(cls, objects):
+        objects = list(objects)
+        cls.cake_types = dict(Cake.CAKE_TYPE_CHOICES)
+        return super(PageLookupEntity, cls).process_many(objects)
+
+
+class CustomFullProcessEntity(CakeTypeEntity):
+    def full_process(self):
+        return {'custom': self.obj['pk']}
+
+
+class WireFlavorEntity(Entity):
+    wire = True
+
+    name = fields.CharField()
+    added = fields.DateField()
+
+
+class WireEntity(Entity):
+    wire = True
+
+    price = fields.DecimalField()
+    baked = fields.DateTimeField()
+    flavor = fields.EntityField(WireFlavorEntity)
+
+
+class WireFullProcessEntity(WireEntity):
+    def full_process(self, serializer=None):
+        processed = super(WireFullProcessEntity, self).full_process(serializer)
+        processed['custom'] = True
+        return processed
+
+
+class CachedCakeEntity(CakeTypeEntity):
+    cache_timeout = 60
+    cache_version_attribute = 'message'
+    required_attributes = ()
+
+    processed_count = 0
+
+    def process(self, data):
+        CachedCakeEntity.processed_count += 1
+        return data
+
+
+class EntityTestCase(TestCase):
+    fixtures = ['test_data.json']
+
+    def test_full_process(self):
+        cake = Cake.objects.get(pk=1)
+
+        self.assertEqual({
+            'resource_uri': u'/simple/1/',
+            'message': u'Cake 1',
+            'cake_type': u'Birthday Cake',
+            'resource_id': 1}, CakeDetailEntity(cake).full_process())
+
+    def test_full_process_dict(self):
+        self.assertEqual(
+            {'resource_id': 7, 'cake_type': u'Graduation Cake'},
+            CakeTypeEntity({'pk': 7, 'cake_type': 2}).full_process())
+
+    def test_paths_hooks_and_defaults(self):
+        cake = Cake(message=u'Cake')
+        processed = NestedTimeEntity(cake).full_process()
+
+        self.assertTrue(processed['nested_time'] is not None)
+        self.assertEqual(u'n/a', processed['missing'])
+        self.assertEqual(u'CAKE', processed['shouted'])
+
+    def test_field_plan(self):
+        plan = dict((p.field_name, p) for p in CakeDetailEntity.field_plan)
+
+        self.assertEqual(
+            set(['resource_id', 'cake_type', 'message']), set(plan.keys()))
+        self.assertTrue(plan['cake_type'].hook is not None)
+        self.assertTrue(plan['message'].hook is None)
+
+        # Subclasses get their own copies of inherited fields.
+        self.assertFalse(
+            CakeListEntity.base_fields['cake_type'] is
+            CakeDetailEntity.base_fields['cake_type'])
+
+    def test_process_many(self):
+        cakes = Cake.objects.order_by('pk')[:5]
+
+        self.assertEqual(
+            [CakeDetailEntity(cake).full_process() for cake in cakes],
+            CakeDetailEntity.process_many(cakes))
+
+        self.assertEqual([], CakeDetailEntity.process_many([]))
+
+    def test_process_many_override(self):
+        objects = [{'pk': 1, 'cake_type': 1}, {'pk': 2, 'cake_type': 3}]
+
+        self.assertEqual(
+            [u'Birthday Cake', u'Shameful Pride Cake'],
+            [e['cake_type'] for e in PageLookupEntity.process_many(objects)])
+
+        self.assertEqual(
+            [{'custom': 1}, {'custom': 2}],
+            CustomFullProcessEntity.process_many(objects))
+
+    def test_projection(self):
+        projection = QuerySetProjection.for_model(
+            Cake, CakeDetailEntity.get_attribute_paths())
+
+        self.assertEqual(
+            set(['pk', 'cake_type', 'message']), set(projection.columns))
+
+        rows = projection.rows(projection.apply(Cake.objects.filter(pk=1)))
+
+        self.assertEqual(
+            [CakeDetailEntity(Cake.objects.get(pk=1)).full_process()],
+            CakeDetailEntity.process_many(rows))
+
+        # Entities reading more than plain columns aren't projected.
+        self.assertEqual(None, NestedTimeEntity.get_attribute_paths())
+        self.assertEqual(
+            [('pk',), ('nested_time', 'time'), ('nested_time', 'missing')],
+            NestedTimeEntity.get_attribute_paths(strict=False))
+
+        # Nor are overrides that don't declare what they read.
+        self.assertEqual(None, CustomFullProcessEntity.get_attribute_paths())
+        self.assertEqual(
+            set([('pk',), ('cake_type',)]),
+            set(CustomFullProcessEntity.get_attribute_paths(strict=False)))
+        self.assertEqual(None, QuerySetProjection.for_model(
+            Cake, [('nested_time', 'time')]))
+
+    def test_wire_mode(self):
+        obj = {
+            'price': '4.50',
+            'baked': datetime.datetime(2012, 10, 2, 9, 30),
+            'flavor': {'name': u'Lemon', 'added': datetime.date(2012, 10, 1)}}
+
+        # Without a serializer, fields give Python values as usual.
+        processed = WireEntity(obj).full_process()
+        self.assertEqual(decimal.Decimal('4.50'), processed['price'])
+        self.assertTrue(isinstance(processed['baked'], datetime.datetime))
+
+        serializer = Serializer(datetime_formatting='rfc-2822')
+        processed = WireEntity.process_many([obj], serializer)[0]
+
+        self.assertEqual({
+            'price': u'4.50',
+            'baked': serializer.format_datetime(
+                WireEntity.base_fields['baked'].convert(obj['baked'])),
+            'flavor': {'name': u'Lemon', 'added': u'1 Oct 2012'}}, processed)
+
+        # The serializer has nothing left to convert.
+        self.assertTrue(serializer.to_simple(processed, {}) is processed)
+
+        # Custom ``full_process`` methods are handed the serializer.
+        processed['custom'] = True
+        self.assertEqual(
+            [processed], WireFullProcessEntity.process_many([obj], serializer))
+
+        # Wire mode plans are compiled once per kind of serializer.
+        self.assertTrue(
+            WireEntity.get_field_plan(serializer) is
+            WireEntity.get_field_plan(
+                Serializer(datetime_formatting='rfc-2822')))
+        self.assertTrue(
+            WireEntity.get_field_plan(serializer) is not
+            WireEntity.get_field_plan(
+                Serializer(datetime_formatting='iso-8601')))
+        self.assertTrue(WireEntity.get_field_plan() is WireEntity.field_plan)
+        self.assertTrue(
+            CakeTypeEntity.get_field_plan(serializer) is
+            CakeTypeEntity.field_plan)
+
+    def test_cache(self):
+        cache.clear()
+        CachedCakeEntity.processed_count = 0
+
+        objects = [
+            {'pk': 1, 'cake_type': 1, 'message': u'One'},
+            {'pk': 2, 'cake_type': 3, 'message': u'Two'}]
+
+        processed = CachedCakeEntity.process_many(objects)
+        self.assertEqual(CakeTypeEntity.process_many(objects), processed)
+        self.assertEqual(2, CachedCakeEntity.processed_count)
+
+        self.assertEqual(processed, CachedCakeEntity.process_many(objects))
+        self.assertEqual(2, CachedCakeEntity.processed_count)
+
+        # Only the changed object is processed again.
+        objects[1] = {'pk': 2, 'cake_type': 1, 'message': u'Changed'}
+        processed = CachedCakeEntity.process_many(objects)
+
+        self.assertEqual(u'Birthday Cake', processed[1]['cake_type'])
+        self.assertEqual(3, CachedCakeEntity.processed_count)
+
+        # The version is loaded along with the entity's fields.
+        self.assertTrue(('message',) in CachedCakeEntity.get_attribute_paths())
+
+        cakes = Cake.objects.order_by('pk')[:3]
+        self.assertEqual(
+            CakeTypeEntity.process_many(cakes),
+            CachedCakeEntity.process_many(cakes))
+
+        # Objects without a primary key aren't cached.
+        cakes = [Cake(cake_type=cake_type, message=u'Unsaved')
+                 for cake_type in (1, 2, 3)]
+        self.assertEqual(
+            CakeTypeEntity.process_many(cakes),
+            CachedCakeEntity.process_many(cakes))
+        self.assertEqual(
+            [u'Birthday Cake', u'Graduation Cake', u'Shameful Pride Cake'],
+            [data['cake_type'] for data in CachedCakeEntity.process_many(
+                [{'pk': None, 'cake_type': cake_type, 'message': u'Dict'}
+                 for cake_type in (1, 2, 3)])])
+
+    def test_restrict(self):
+        restricted = CakeDetailEntity.restrict(fields=['message', 'cake_type'])
+
+        self.assertEqual(
+            ['cake_type', 'message'], sorted(restricted.base_fields))
+        self.assertTrue(restricted is CakeDetailEntity.restrict(
+            fields=['cake_type', 'message']))
+        self.assertTrue(CakeDetailEntity.restrict() is CakeDetailEntity)
+
+        cake = Cake.objects.get(pk=1)
+        self.assertEqual({
+            'message': u'Cake 1', 'cake_type': u'Birthday Cake',
+            'resource_uri': u'/simple/1/'}, restricted(cake).full_process())
+
+        self.assertEqual(
+            ['cake_type', 'message'],
+            sorted(CakeDetailEntity.restrict(
+                exclude=['resource_id']).base_fields))
+
+    def test_hook_kinds(self):
+        obj = {'message': u'Cake', 'cake_type': 1}
+
+        self.assertEqual(
+            {'message': u'CAKE', 'cake_type': u'StaticHookEntity 1'},
+            StaticHookEntity(obj).full_process())
+
+    def test_instance_fields(self):
+        obj = {'message': u'Cake', 'cake_type': 1}
+        entity = StaticHookEntity(obj)
+
+        del entity.fields['cake_type']
+        entity.fields['message']._default = u'n/a'
+
+        self.assertEqual({'message': u'CAKE'}, entity.full_process())
+        self.assertFalse(entity.fields is StaticHookEntity(obj).fields)
+        self.assertEqual(
+            ['cake_type', 'message'], sorted(StaticHookEntity.base_fields))
+        self.assertFalse(StaticHookEntity.base_fields['message'].has_default())
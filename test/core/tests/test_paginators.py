@@ -0,0 +1,95 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from delicious_cake.paginators import Paginator
+
+from core.models import Cake
+
+__all__ = ('PaginatorTestCase',)
+
+
+class PaginatorTestCase(TestCase):
+    fixtures = ['test_data.json']
+
+    def setUp(self):
+        super(PaginatorTestCase, self).setUp()
+        cache.clear()
+
+    def _page(self, request_data=None, **kwargs):
+        return Paginator(
+            request_data or {}, Cake.objects.order_by('pk'),
+            resource_uri='/simple/', limit=20, **kwargs).page()
+
+    def test_exact_count(self):
+        page = self._page()
+
+        self.assertEqual(50, page['meta']['total_count'])
+        self.assertEqual(20, len(page['objects']))
+
+    def test_no_count(self):
+        page = self._page({'offset': 20}, count_strategy='none')
+
+        self.assertEqual(None, page['meta']['total_count'])
+        self.assertEqual(20, len(page['objects']))
+        self.assertTrue(page['meta']['next'] is not None)
+
+        with self.assertNumQueries(1):
+            page = self._page({'offset': 40}, count_strategy='none')
+
+        self.assertEqual(10, len(page['objects']))
+        self.assertEqual(None, page['meta']['next'])
+
+    def test_cached_count(self):
+        self.assertEqual(
+            50, self._page(count_strategy='cached')['meta']['total_count'])
+
+        Cake.objects.filter(pk=1).delete()
+
+        self.assertEqual(
+            50, self._page(count_strategy='cached')['meta']['total_count'])
+        self.assertEqual(49, self._page()['meta']['total_count'])
+
+    def test_estimated_count_fallback(self):
+        # Only PostgreSQL has estimates; everything else counts exactly.
+        self.assertEqual(
+            50, self._page(count_strategy='estimated')['meta']['total_count'])
+
+    def test_requested_exact_count(self):
+        page = self._page({'exact_count': '1'}, count_strategy='none')
+        self.assertEqual(50, page['meta']['total_count'])
+
+        page = self._page(
+            {'exact_count': '1'}, count_strategy='none', max_exact_count=50)
+        self.assertEqual(50, page['meta']['total_count'])
+        self.assertFalse('total_count_capped' in page['meta'])
+
+    def test_capped_count(self):
+        # The capped count is a lower bound, so doesn't decide ``next``.
+        page = self._page({'exact_count': '1', 'offset': 20},
+                          count_strategy='none', max_exact_count=30)
+        self.assertEqual(30, page['meta']['total_count'])
+        self.assertTrue(page['meta']['total_count_capped'])
+        self.assertEqual(20, len(page['objects']))
+        self.assertTrue(page['meta']['next'] is not None)
+
+        page = self._page({'exact_count': '1', 'offset': 40},
+                          count_strategy='none', max_exact_count=30)
+        self.assertEqual(10, len(page['objects']))
+        self.assertEqual(None, page['meta']['next'])
+
+    def test_empty_queryset(self):
+        for count_strategy in Paginator.COUNT_STRATEGIES:
+            page = Paginator(
+                {}, Cake.objects.filter(pk__in=[]), resource_uri='/simple/',
+                limit=20, count_strategy=count_strategy).page()
+
+            self.assertEqual([], list(page['objects']))
+            self.assertEqual(None, page['meta']['next'])
+
+            if count_strategy != Paginator.COUNT_NONE:
+                self.assertEqual(0, page['meta']['total_count'])
+
+    def test_unknown_count_strategy(self):
+        self.assertRaises(
+            ImproperlyConfigured, self._page, count_strategy='guess')
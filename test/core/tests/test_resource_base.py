@@ -1,6 +1,8 @@
 from django.http import HttpRequest
 
+from delicious_cake.utils import LRUCache
 from delicious_cake.resources import Resource
+from delicious_cake.utils.mime import negotiated_formats
 from delicious_cake.test import ResourceTestCase
 
 from core.models import Cake
@@ -72,6 +74,45 @@ class BaseResourceTestCase(ResourceTestCase):
                 'text/plain,application/xml,application/json;q=0.9,*/*;q=0.8'}
         self.assertEqual(resource.determine_format(request), 'application/xml')
 
+    def test_determine_format_cache(self):
+        request = HttpRequest()
+        request.META = {'HTTP_ACCEPT': 'application/xml;q=0.9,text/yaml'}
+        resource = UnimplementedDetailResource()
+        serializer = resource._meta.serializer
+
+        key = ('application/xml;q=0.9,text/yaml', None, serializer,
+               'application/json')
+        negotiated_formats.clear()
+
+        self.assertEqual(resource.determine_format(request), 'text/yaml')
+        self.assertEqual(negotiated_formats.get(key), 'text/yaml')
+        self.assertEqual(request._negotiated_format, (key, 'text/yaml'))
+
+        # The same request reuses its own result...
+        negotiated_formats.set(key, 'application/xml')
+        self.assertEqual(
+            resource.determine_format(request), 'text/yaml')
+
+        # ...and another one with the same header is answered from the cache.
+        request = HttpRequest()
+        request.META = {'HTTP_ACCEPT': 'application/xml;q=0.9,text/yaml'}
+        self.assertEqual(
+            resource.determine_format(request), 'application/xml')
+
+        negotiated_formats.clear()
+
+    def test_lru_cache(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(None, cache.get('b'))
+        self.assertEqual(3, cache.get('c'))
+
     def test_jsonp_validation(self):
         resp = self.api_client.get('/simple/1/?format=jsonp&callback=()')
 
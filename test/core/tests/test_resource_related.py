@@ -0,0 +1,123 @@
+from django.db import connection
+
+from delicious_cake.queries import get_related_lookups
+from delicious_cake.test import ResourceTestCase
+
+from core.models import Bakery, Topping, Pastry
+
+__all__ = ('RelatedResourceTestCase',)
+
+
+class RelatedResourceTestCase(ResourceTestCase):
+    def setUp(self):
+        super(RelatedResourceTestCase, self).setUp()
+
+        toppings = [Topping.objects.create(name=name)
+                    for name in (u'Sprinkles', u'Icing')]
+
+        for index in range(10):
+            bakery = Bakery.objects.create(name=u'Bakery %s' % index)
+
+            for pastry_index in range(2):
+                pastry = Pastry.objects.create(
+                    name=u'Pastry %s-%s' % (index, pastry_index),
+                    bakery=bakery)
+                pastry.toppings.add(*toppings)
+
+    def test_related_list_resource(self):
+        response = self.api_client.get('/pastries/', data={'limit': 3})
+        self.assertHttpOK(response)
+
+        self.assertEqual([{
+            'name': u'Pastry 0-0',
+            'bakery': {'name': u'Bakery 0', 'pastry_count': 2},
+            'toppings': [u'Sprinkles', u'Icing']}, {
+            'name': u'Pastry 0-1',
+            'bakery': {'name': u'Bakery 0', 'pastry_count': 2},
+            'toppings': [u'Sprinkles', u'Icing']}, {
+            'name': u'Pastry 1-0',
+            'bakery': {'name': u'Bakery 1', 'pastry_count': 2},
+            'toppings': [u'Sprinkles', u'Icing']}],
+            self.deserialize(response)['objects'])
+
+    def test_related_list_queries(self):
+        # COUNT, the page (joined with the bakery) and the toppings --
+        # however many objects are on the page.
+        for limit in (1, 20):
+            with self.assertNumQueries(3):
+                response = self.api_client.get('/sparse/pastries/', data={
+                    'limit': limit, 'exclude': 'bakery__pastry_count'})
+
+            self.assertEqual(
+                limit, len(self.deserialize(response)['objects']))
+
+        # Counted relations are counted, not prefetched: one COUNT for each
+        # pastry's bakery.
+        with self.assertNumQueries(23):
+            self.api_client.get('/pastries/', data={'limit': 20})
+
+    def test_related_lookups(self):
+        self.assertEqual((['bakery'], ['toppings']), get_related_lookups(
+            Pastry, [('bakery', 'name'), ('bakery', 'pastries', 'count'),
+                     ('toppings', 'all')]))
+        self.assertEqual(([], ['pastries']), get_related_lookups(
+            Bakery, [('pastries', 'exists'), ('pastries', 'all')]))
+
+    def test_sparse_fieldsets(self):
+        # Only COUNT & the page, without the unused columns.
+        with self.assertNumQueries(2):
+            response = self.api_client.get(
+                '/sparse/pastries/', data={'limit': 2, 'fields': 'name'})
+
+        self.assertFalse('bakery_id' in connection.queries[-1]['sql'])
+        self.assertEqual(
+            [{'name': u'Pastry 0-0'}, {'name': u'Pastry 0-1'}],
+            self.deserialize(response)['objects'])
+
+        with self.assertNumQueries(2):
+            response = self.api_client.get('/sparse/pastries/', data={
+                'limit': 1, 'fields': 'name, bakery__name'})
+
+        self.assertEqual(
+            [{'name': u'Pastry 0-0', 'bakery': {'name': u'Bakery 0'}}],
+            self.deserialize(response)['objects'])
+
+        response = self.api_client.get('/sparse/pastries/', data={
+            'limit': 1, 'exclude': 'toppings,bakery__pastry_count'})
+        self.assertEqual(
+            [{'name': u'Pastry 0-0', 'bakery': {'name': u'Bakery 0'}}],
+            self.deserialize(response)['objects'])
+
+        response = self.api_client.get('/sparse/pastries/', data={
+            'limit': 1, 'fields': 'bakery', 'exclude': 'bakery__name'})
+        self.assertEqual(
+            [{'bakery': {'pastry_count': 2}}],
+            self.deserialize(response)['objects'])
+
+        # Other resources don't take the parameters.
+        response = self.api_client.get(
+            '/pastries/', data={'limit': 1, 'fields': 'name'})
+        self.assertEqual(3, len(self.deserialize(response)['objects'][0]))
+
+    def test_sparse_fieldsets_select_related(self):
+        # The handler's ``select_related`` relations are loaded regardless.
+        with self.assertNumQueries(2):
+            response = self.api_client.get('/sparse/related/pastries/', data={
+                'limit': 2, 'fields': 'name'})
+
+        self.assertHttpOK(response)
+        self.assertTrue('core_bakery' in connection.queries[-1]['sql'])
+        self.assertEqual(
+            [{'name': u'Pastry 0-0'}, {'name': u'Pastry 0-1'}],
+            self.deserialize(response)['objects'])
+
+    def test_sparse_fieldsets_invalid(self):
+        response = self.api_client.get('/sparse/pastries/', data={
+            'fields': 'name,nope,bakery__nope,name__first'})
+        self.assertHttpBadRequest(response)
+
+        errors = self.deserialize(response)
+        self.assertEqual('INVALID_FIELDS', errors['code'])
+        self.assertEqual(
+            ['bakery__nope', 'name__first', 'nope'],
+            sorted(errors['errors']))
@@ -1,6 +1,18 @@
+import json
+
+from django.core.cache import cache
+from django.test.client import RequestFactory
+
+import delicious_cake.http as cake_http
+
 from delicious_cake.test import ResourceTestCase
+from delicious_cake.exceptions import BadRequest
+from delicious_cake.utils import unwrap_data
 
 from core.models import Cake
+from core.resources import (
+    SimpleListResource, ImportSimpleListResource, CachedSimpleListResource,
+    CachedSimpleDetailResource, AuthenticatedCachedSimpleListResource,)
 
 __all__ = ('SimpleResourceTestCase',)
 
@@ -135,6 +147,116 @@ class SimpleResourceTestCase(ResourceTestCase):
     def test_simple_list_resource(self):
         self._test_list_resource('simple')
 
+    def test_projected_simple_list_resource(self):
+        self._test_list_resource('projected/simple')
+
+    def test_projected_list_matches_unprojected(self):
+        projected = self.deserialize(
+            self.api_client.get('/projected/simple/', data={'limit': 0}))
+        simple = self.deserialize(
+            self.api_client.get('/simple/', data={'limit': 0}))
+
+        self.assertEqual(simple['meta']['total_count'],
+                         projected['meta']['total_count'])
+
+        self.assertEqual(simple['objects'], projected['objects'])
+
+    def test_streamed_simple_list_resource(self):
+        self._test_list_resource('streamed/simple')
+
+    def test_streamed_list_matches_unstreamed(self):
+        response = self.api_client.get('/streamed/simple/')
+        self.assertTrue(response.streaming)
+
+        streamed = self.deserialize(response)
+
+        simple = self.deserialize(self.api_client.get('/simple/'))
+        simple['meta']['next'] = simple['meta']['next'].replace(
+            '/simple/', '/streamed/simple/', 1)
+
+        self.assertEqual(simple, streamed)
+
+        # Formats without a streaming serializer are sent in one piece.
+        response = self.api_client.get('/streamed/simple/', format='xml')
+        self.assertFalse(response.streaming)
+
+    def test_streamed_list_errors(self):
+        # Errors in the first chunk give the usual error response.
+        response = self.api_client.get('/streamed/broken/')
+        self.assertHttpBadRequest(response)
+        self.assertFalse(response.streaming)
+
+    def test_streamed_list_hooks(self):
+        # ``process_http_response`` gets the processed entities, so the
+        # response isn't streamed.
+        response = self.api_client.get('/streamed/hooked/')
+        self.assertFalse(response.streaming)
+        self.assertEqual(u'Birthday Cake', response['X-Cake-Types'])
+
+    def test_basic_paginator_simple_list_resource(self):
+        self._test_list_resource('basic/simple')
+
+    def test_cursor_simple_list_resource(self):
+        self._test_list_resource('cursor/simple')
+
+    def test_cursor_pagination(self):
+        Cake.objects.filter(pk__in=[3, 10, 11]).update(
+            cake_type=Cake.CAKE_TYPE_SCHADENFREUDE)
+
+        expected = list(
+            Cake.objects.order_by('-cake_type', 'pk').values_list(
+                'pk', flat=True))
+
+        # Walk forwards through every page...
+        pages = []
+        uri = '/cursor/simple/?limit=15'
+
+        while uri is not None:
+            page = self.deserialize(self.api_client.get(uri))
+            pages.append([e['resource_id'] for e in page['objects']])
+            uri = page['meta']['next']
+
+        self.assertEqual([15, 15, 15, 5], [len(p) for p in pages])
+        self.assertEqual(expected, sum(pages, []))
+        self.assertEqual(None, self.deserialize(self.api_client.get(
+            '/cursor/simple/?limit=15'))['meta']['previous'])
+
+        # ...and back again.
+        uri = page['meta']['previous']
+        pages.pop()
+
+        while uri is not None:
+            page = self.deserialize(self.api_client.get(uri))
+            self.assertEqual(
+                pages.pop(), [e['resource_id'] for e in page['objects']])
+            uri = page['meta']['previous']
+
+        self.assertEqual([], pages)
+
+        # Tampered cursors are rejected.
+        response = self.api_client.get('/cursor/simple/?cursor=abc')
+        self.assertHttpBadRequest(response)
+
+    def test_projected_cursor_pagination(self):
+        Cake.objects.filter(pk__in=[4, 20]).update(message=u'Aaa')
+
+        expected = list(
+            Cake.objects.order_by('message', 'pk').values_list(
+                'pk', flat=True))
+
+        pages = []
+        uri = '/projected/cursor/simple/?limit=15'
+
+        while uri is not None:
+            page = self.deserialize(self.api_client.get(uri))
+            pages.append([e['resource_id'] for e in page['objects']])
+            uri = page['meta']['next']
+
+        self.assertEqual(expected, sum(pages, []))
+
+        # Cursor paginators don't count by default.
+        self.assertEqual(None, page['meta']['total_count'])
+
     def test_forced_simple_detail_resource(self):
         self._test_detail_resource('forced/simple')
 
@@ -152,3 +274,296 @@ class SimpleResourceTestCase(ResourceTestCase):
 
     def test_custom_simple_list_resource(self):
         self._test_list_resource('custom/simple')
+
+    def test_lazy_request_data(self):
+        resource = SimpleListResource()
+        factory = RequestFactory()
+
+        # Bodies are only deserialized when ``request.DATA`` is used.
+        request = factory.post(
+            '/simple/', data='{"bad', content_type='application/json')
+        resource.process_body(request)
+
+        self.assertRaises(BadRequest, lambda: request.DATA['message'])
+
+        request = factory.post(
+            '/simple/', data='{"message": "Cake"}',
+            content_type='application/json')
+        resource.process_body(request)
+
+        self.assertTrue(isinstance(request.DATA, dict))
+        self.assertEqual(u'Cake', request.DATA['message'])
+        self.assertTrue('message' in request.DATA)
+        self.assertEqual(['message'], list(request.DATA))
+
+        data = unwrap_data(request.DATA)
+        self.assertTrue(type(data) is dict)
+        self.assertEqual('{"message": "Cake"}', json.dumps(data))
+        self.assertTrue(unwrap_data(data) is data)
+
+        request = factory.get('/simple/')
+        resource.process_body(request)
+
+        self.assertEqual({}, request.DATA)
+
+    def test_max_body_size(self):
+        response = self.api_client.post('/limited/simple/', data={
+            'cake_type': Cake.CAKE_TYPE_BIRTHDAY, 'message': BIRTHDAY_MESSAGE})
+        self.assertHttpCreated(response)
+
+        response = self.api_client.post('/limited/simple/', data={
+            'cake_type': Cake.CAKE_TYPE_BIRTHDAY, 'message': 'x' * 200})
+        self.assertHttpRequestEntityTooLarge(response)
+
+    def test_stream_body(self):
+        cakes = [
+            {'cake_type': Cake.CAKE_TYPE_BIRTHDAY, 'message': u'Cake %d' % i}
+            for i in range(3)]
+
+        response = self.api_client.put('/import/simple/', data=cakes)
+        self.assertHttpOK(response)
+
+        self.assertEqual(
+            [u'Cake 0', u'Cake 1', u'Cake 2'],
+            [cake.message for cake in Cake.objects.order_by('pk')])
+
+        # Or wrapped up like a list response.
+        response = self.api_client.put(
+            '/import/simple/', data={'objects': cakes[:1], 'meta': {}})
+        self.assertHttpOK(response)
+        self.assertEqual(1, Cake.objects.count())
+
+        response = self.api_client.put('/import/simple/', data=[])
+        self.assertHttpOK(response)
+        self.assertEqual(0, Cake.objects.count())
+
+        # Items are only parsed as they're used.
+        resource = ImportSimpleListResource()
+        request = RequestFactory().put(
+            '/import/simple/', data='[{"message": "Cake"}, {"bad',
+            content_type='application/json')
+        resource.process_body(request)
+
+        self.assertEqual({u'message': u'Cake'}, next(request.DATA))
+        self.assertRaises(BadRequest, next, request.DATA)
+
+        response = self.api_client.put('/import/simple/', data=u'Cake')
+        self.assertHttpBadRequest(response)
+
+        response = self.api_client.put(
+            '/import/simple/', data=cakes * 20)
+        self.assertHttpRequestEntityTooLarge(response)
+
+    def test_response_cache(self):
+        cache.clear()
+
+        response = self.api_client.get('/cached/simple/1/')
+        self.assertHttpOK(response)
+        self.assertEqual(u'Cake 1', self.deserialize(response)['message'])
+
+        # Straight from the cache.
+        with self.assertNumQueries(0):
+            cached_response = self.api_client.get('/cached/simple/1/')
+
+        self.assertHttpOK(cached_response)
+        self.assertEqual(response.content, cached_response.content)
+        self.assertEqual(response['Content-Type'], cached_response['Content-Type'])
+
+        # Different URL arguments & formats are cached separately.
+        self.assertEqual(
+            u'Cake 2', self.deserialize(
+                self.api_client.get('/cached/simple/2/'))['message'])
+        self.assertTrue(self.api_client.get(
+            '/cached/simple/1/', format='xml')['Content-Type'].startswith(
+                'application/xml'))
+
+        # Saving a cake invalidates the cache.
+        Cake.objects.filter(pk=1).update(message=u'Stale')
+        self.assertEqual(u'Cake 1', self.deserialize(
+            self.api_client.get('/cached/simple/1/'))['message'])
+
+        Cake.objects.get(pk=2).save()
+        self.assertEqual(u'Stale', self.deserialize(
+            self.api_client.get('/cached/simple/1/'))['message'])
+
+        # Errors aren't cached.
+        self.assertHttpNotFound(self.api_client.get('/cached/simple/999/'))
+        Cake.objects.create(
+            pk=999, cake_type=Cake.CAKE_TYPE_BIRTHDAY, message=u'New')
+        self.assertHttpOK(self.api_client.get('/cached/simple/999/'))
+
+    def test_response_cache_list(self):
+        cache.clear()
+
+        response = self.api_client.get('/cached/simple/', data={'limit': 2})
+        self.assertEqual(2, len(self.deserialize(response)['objects']))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(response.content, self.api_client.get(
+                '/cached/simple/', data={'limit': 2}).content)
+
+        # Query parameters are part of the key, whatever their order.
+        self.api_client.get('/cached/simple/?offset=0&limit=2')
+
+        with self.assertNumQueries(0):
+            self.api_client.get('/cached/simple/?limit=2&offset=0')
+
+        self.assertEqual(1, len(self.deserialize(self.api_client.get(
+            '/cached/simple/', data={'limit': 1}))['objects']))
+
+        # So is the requestor.
+        with self.assertNumQueries(2):
+            self.api_client.get(
+                '/cached/simple/', data={'limit': 2}, REMOTE_ADDR='10.0.0.1')
+
+        # No models are declared, so it's up to ``invalidate``.
+        Cake.objects.all().delete()
+
+        with self.assertNumQueries(0):
+            self.api_client.get('/cached/simple/', data={'limit': 2})
+
+        CachedSimpleListResource.invalidate()
+
+        response = self.api_client.get('/cached/simple/', data={'limit': 2})
+        self.assertEqual([], self.deserialize(response)['objects'])
+
+        # Other requests aren't cached at all.
+        response = self.api_client.post('/cached/simple/', data={
+            'cake_type': Cake.CAKE_TYPE_BIRTHDAY, 'message': BIRTHDAY_MESSAGE})
+        self.assertHttpCreated(response)
+
+    def test_response_cache_per_identifier(self):
+        factory = RequestFactory()
+
+        def get_keys(resource):
+            return [resource.get_response_cache_key(factory.get(
+                '/cached/simple/', REMOTE_USER=user)) for user in ('a', 'b')]
+
+        # Responses to authenticated requests are cached per requestor...
+        keys = get_keys(AuthenticatedCachedSimpleListResource())
+        self.assertNotEqual(keys[0], keys[1])
+
+        # ...and shared by everyone otherwise.
+        keys = get_keys(CachedSimpleDetailResource())
+        self.assertEqual(keys[0], keys[1])
+
+    def test_response_cache_headers(self):
+        cache.clear()
+
+        resource = CachedSimpleDetailResource()
+        request = RequestFactory().get('/cached/simple/1/')
+
+        def create_response(request):
+            response = cake_http.HttpResponse(content='Cake')
+            response['Set-Cookie'] = 'sessionid=secret'
+            response['X-Cake'] = 'Birthday'
+            return response
+
+        response = resource.dispatch_cached(create_response, request)
+        self.assertEqual('sessionid=secret', response['Set-Cookie'])
+
+        # Per-user headers aren't replayed from the cache.
+        response = resource.dispatch_cached(create_response, request)
+        self.assertEqual('Cake', response.content)
+        self.assertEqual('Birthday', response['X-Cake'])
+        self.assertFalse(response.has_header('Set-Cookie'))
+
+    def test_conditional_get(self):
+        response = self.api_client.get('/conditional/simple/1/')
+        self.assertHttpOK(response)
+        etag = response['ETag']
+
+        response = self.api_client.get(
+            '/conditional/simple/1/', HTTP_IF_NONE_MATCH=etag)
+        self.assertHttpNotModified(response)
+        self.assertEqual(etag, response['ETag'])
+        self.assertEqual('', response.content)
+
+        self.assertHttpOK(self.api_client.get(
+            '/conditional/simple/1/', HTTP_IF_NONE_MATCH='"other"'))
+
+        Cake.objects.filter(pk=1).update(message=u'Changed')
+        response = self.api_client.get(
+            '/conditional/simple/1/', HTTP_IF_NONE_MATCH=etag)
+        self.assertHttpOK(response)
+        self.assertNotEqual(etag, response['ETag'])
+
+        # There's no content to hash for HEADs.
+        response = self.api_client.head('/conditional/simple/1/')
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_conditional_get_preconditions(self):
+        response = self.api_client.get('/conditional/simple/')
+        self.assertHttpOK(response)
+        etag = response['ETag']
+        self.assertEqual(
+            'Fri, 21 Dec 2012 12:00:00 GMT', response['Last-Modified'])
+
+        # Only the precondition hook's query is run.
+        with self.assertNumQueries(1):
+            response = self.api_client.get(
+                '/conditional/simple/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertHttpNotModified(response)
+
+        with self.assertNumQueries(1):
+            response = self.api_client.head(
+                '/conditional/simple/', HTTP_IF_NONE_MATCH='"x", %s' % etag)
+
+        self.assertHttpNotModified(response)
+
+        response = self.api_client.get(
+            '/conditional/simple/',
+            HTTP_IF_MODIFIED_SINCE='Fri, 21 Dec 2012 12:00:00 GMT')
+        self.assertHttpNotModified(response)
+
+        response = self.api_client.get(
+            '/conditional/simple/',
+            HTTP_IF_MODIFIED_SINCE='Thu, 20 Dec 2012 12:00:00 GMT')
+        self.assertHttpOK(response)
+
+        # ``If-None-Match`` takes precedence.
+        response = self.api_client.get(
+            '/conditional/simple/', HTTP_IF_NONE_MATCH='"x"',
+            HTTP_IF_MODIFIED_SINCE='Fri, 21 Dec 2012 12:00:00 GMT')
+        self.assertHttpOK(response)
+
+        # Other representations have other ETags.
+        response = self.api_client.get(
+            '/conditional/simple/', format='xml', HTTP_IF_NONE_MATCH=etag)
+        self.assertHttpOK(response)
+        self.assertNotEqual(etag, response['ETag'])
+        self.assertEqual('Accept', response['Vary'])
+
+        response = self.api_client.get(
+            '/conditional/simple/', data={'fields': 'message'},
+            HTTP_IF_NONE_MATCH=etag)
+        self.assertHttpOK(response)
+        self.assertNotEqual(etag, response['ETag'])
+
+        Cake.objects.get(pk=1).delete()
+        response = self.api_client.get(
+            '/conditional/simple/', HTTP_IF_NONE_MATCH=etag)
+        self.assertHttpOK(response)
+        self.assertNotEqual(etag, response['ETag'])
+
+    def test_columns_format(self):
+        response = self.api_client.get(
+            '/simple/', data={'limit': 2, 'format': 'columns'})
+        self.assertHttpOK(response)
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/vnd.cake.columns+json'))
+
+        objects = json.loads(response.content)['objects']
+        self.assertEqual(
+            ['cake_type', 'message', 'resource_id', 'resource_uri'],
+            objects['fields'])
+        self.assertEqual(
+            [[u'Birthday Cake', u'Cake 1', 1, u'/simple/1/'],
+             [u'Birthday Cake', u'Cake 2', 2, u'/simple/2/']],
+            objects['rows'])
+
+        self.assertEqual(
+            self.deserialize(self.api_client.get(
+                '/simple/', data={'limit': 2}))['objects'],
+            self.deserialize(response)['objects'])
@@ -0,0 +1,279 @@
+import json
+import uuid
+import decimal
+import datetime
+from StringIO import StringIO
+
+from django.test import TestCase
+from django.utils.datastructures import SortedDict
+
+from delicious_cake.serializers import Serializer
+from delicious_cake.exceptions import (
+    BadRequest, UnsupportedSerializationFormat,)
+from delicious_cake.utils.mime import negotiate_format
+from delicious_cake.utils.json_stream import JSONItemParser
+from delicious_cake.utils.json_backend import (
+    JSONBackend, UltraJSONBackend, get_json_backend,)
+
+__all__ = ('SerializerTestCase',)
+
+
+class Tags(list):
+    pass
+
+
+class CSVSerializer(Serializer):
+    def to_csv(self, data, options=None):
+        return u'\n'.join(u','.join(row) for row in data)
+
+
+class UpperCaseSerializer(Serializer):
+    def to_simple(self, data, options):
+        if isinstance(data, basestring):
+            return data.upper()
+
+        return super(UpperCaseSerializer, self).to_simple(data, options)
+
+
+class SerializerTestCase(TestCase):
+    def test_format_tables(self):
+        serializer = Serializer()
+
+        self.assertEqual(
+            serializer.to_json, serializer.serialize_methods['application/json'])
+        self.assertEqual(
+            serializer.from_xml,
+            serializer.deserialize_methods['application/xml'])
+        self.assertEqual(
+            serializer.to_json_stream,
+            serializer.get_stream_method('application/json'))
+        self.assertEqual(None, serializer.get_stream_method('application/xml'))
+
+        self.assertRaises(
+            UnsupportedSerializationFormat, serializer.serialize,
+            {}, 'text/csv')
+
+    def test_deserialize_content_type_parameters(self):
+        serializer = Serializer()
+
+        self.assertEqual({'a': 1}, serializer.deserialize(
+            '{"a": 1}', 'application/json; charset=utf-8'))
+
+    def test_register_format(self):
+        serializer = CSVSerializer()
+
+        self.assertRaises(
+            UnsupportedSerializationFormat, serializer.serialize,
+            [], 'text/csv')
+
+        serializer.register_format('csv', 'text/csv')
+
+        self.assertTrue('text/csv' in serializer.supported_formats)
+        self.assertEqual(u'a,b\nc,d', serializer.serialize(
+            [['a', 'b'], ['c', 'd']], 'text/csv'))
+
+        # Other instances aren't affected.
+        self.assertFalse('csv' in CSVSerializer().content_types)
+
+    def test_from_json_stream(self):
+        serializer = Serializer()
+        content = '{"meta": {"limit": [1, 2]}, "objects": [1.5e3, -12, ' \
+            '{"name": "Cr\xc3\xa8me"}, [true, null]], "extra": "x"}'
+
+        self.assertEqual(
+            serializer.from_json_stream,
+            serializer.get_deserialize_stream_method(
+                'application/json; charset=utf-8'))
+        self.assertEqual(
+            None, serializer.get_deserialize_stream_method('text/html'))
+
+        self.assertEqual(
+            [1.5e3, -12, {u'name': u'Cr\xe8me'}, [True, None]],
+            list(serializer.from_json_stream(StringIO(content), 'objects')))
+
+        # Items cut across chunks, however small.
+        for chunk_size in (1, 2, 3, 7):
+            self.assertEqual(
+                [1.5e3, -12, {u'name': u'Cr\xe8me'}, [True, None]],
+                list(JSONItemParser(StringIO(content), 'objects', chunk_size)))
+            self.assertEqual([1, 22], list(
+                JSONItemParser(StringIO(' [1, 22] '), chunk_size=chunk_size)))
+
+        for content in ('[1, 2', '[1 2]', '[1]x', '5', '{"objects": [1]}'):
+            self.assertRaises(BadRequest, list,
+                serializer.from_json_stream(StringIO(content)))
+
+    def test_columns(self):
+        serializer = Serializer()
+        data = {
+            'meta': {'total_count': 2},
+            'objects': [
+                {'name': u'Lemon', 'price': 3, 'resource_uri': u'/cakes/1/'},
+                {'name': u'Lime', 'price': None, 'extra': True}]}
+
+        content = serializer.serialize(
+            data, 'application/vnd.cake.columns+json',
+            {'field_names': ['price', 'name']})
+
+        self.assertEqual({
+            'meta': {'total_count': 2},
+            'objects': {
+                'fields': ['price', 'name', 'extra', 'resource_uri'],
+                'rows': [[3, u'Lemon', None, u'/cakes/1/'],
+                         [None, u'Lime', True, None]]}},
+            json.loads(content))
+
+        self.assertEqual(
+            [{'price': 3, 'name': u'Lemon', 'extra': None,
+              'resource_uri': u'/cakes/1/'},
+             {'price': None, 'name': u'Lime', 'extra': True,
+              'resource_uri': None}],
+            serializer.deserialize(
+                content, 'application/vnd.cake.columns+json')['objects'])
+
+        # Anything without a collection is plain JSON.
+        self.assertEqual(
+            serializer.to_json({'name': u'Lemon'}),
+            serializer.to_columns({'name': u'Lemon'}))
+
+        # Only used when asked for.
+        columns = 'application/vnd.cake.columns+json'
+
+        for accept, expected in (
+                (columns, columns),
+                ('*/*', 'application/json'),
+                ('text/plain,*/*;q=0.8', 'application/json')):
+            self.assertEqual(
+                expected, negotiate_format(accept, None, serializer))
+
+    def test_json_backend(self):
+        data = {
+            'name': u'Cr\xe8me br\xfbl\xe9e',
+            'price': decimal.Decimal('4.50'),
+            'baked': datetime.datetime(2012, 10, 2, 9, 30),
+            'toppings': ('sugar', None, True, 2),}
+
+        expected = {
+            'name': u'Cr\xe8me br\xfbl\xe9e',
+            'price': u'4.50',
+            'baked': u'2012-10-02T09:30:00',
+            'toppings': [u'sugar', None, True, 2],}
+
+        serializer = Serializer()
+        self.assertTrue(isinstance(serializer.json_backend, JSONBackend))
+        self.assertTrue(serializer.simplify_json_natively)
+
+        json = serializer.to_json(data)
+        self.assertTrue(isinstance(json, unicode))
+        self.assertEqual(expected, serializer.from_json(json))
+
+        # ``datetime_formatting`` still applies.
+        serializer = Serializer(datetime_formatting='rfc-2822')
+        self.assertEqual(
+            u'"%s"' % serializer.format_datetime(data['baked']),
+            serializer.to_json(data['baked']))
+        self.assertTrue(serializer.to_json(data['baked']).startswith(u'"Tue,'))
+
+        # A custom ``to_simple`` sees all of the data.
+        serializer = UpperCaseSerializer()
+        self.assertFalse(serializer.simplify_json_natively)
+        self.assertEqual(u'"CAKE"', serializer.to_json('cake'))
+
+        # Missing backends fall back on the standard library.
+        backend = get_json_backend('core.does_not.Exist')
+        self.assertEqual(JSONBackend, type(backend))
+
+        backend = get_json_backend('ujson')
+
+        if isinstance(backend, UltraJSONBackend):
+            serializer = Serializer(json_backend='ujson')
+            self.assertFalse(serializer.simplify_json_natively)
+            self.assertEqual(
+                expected, serializer.from_json(serializer.to_json(data)))
+
+    def test_json_backends_agree(self):
+        data = {'price': 1.01234567890123, 'resource_uri': u'/simple/1/'}
+        expected = Serializer(json_backend='json').to_json(data)
+
+        backend = get_json_backend('ujson')
+
+        if isinstance(backend, UltraJSONBackend):
+            json = Serializer(json_backend='ujson').to_json(data)
+
+            self.assertTrue(u'"/simple/1/"' in json)
+            self.assertTrue(u'1.01234567890123' in json)
+            self.assertEqual(
+                Serializer().from_json(expected), Serializer().from_json(json))
+
+    def test_json_bytestrings(self):
+        data = {'name': 'Cr\xc3\xa8me br\xc3\xbbl\xc3\xa9e', 'price': u'4.50'}
+        expected = {'name': u'Cr\xe8me br\xfbl\xe9e', 'price': u'4.50'}
+
+        for json_backend in ('json', 'ujson'):
+            serializer = Serializer(json_backend=json_backend)
+            json = serializer.to_json(data)
+
+            self.assertTrue(isinstance(json, unicode))
+            self.assertEqual(expected, serializer.from_json(json))
+
+        serializer = Serializer()
+        self.assertEqual(
+            u'"Cr\xe8me br\xfbl\xe9e"', serializer.to_json(data['name']))
+
+    def test_to_simple(self):
+        serializer = Serializer()
+
+        page = [{'id': 1, 'name': u'Cake', 'tags': [u'a', u'b']}]
+
+        # Native data is returned as is.
+        self.assertTrue(serializer.to_simple(page, {}) is page)
+
+        self.assertEqual(
+            [u'cake', 1, [u'2012-10-02']],
+            serializer.to_simple(('cake', 1, (datetime.date(2012, 10, 2),)), {}))
+
+        # Subclasses use their base class's converter.
+        class Flag(int):
+            pass
+
+        self.assertEqual(3, serializer.to_simple(Flag(3), {}))
+        self.assertTrue(Flag in serializer.simple_converter_cache)
+
+        # Unknown types are turned into unicode.
+        self.assertEqual(u'4.50', serializer.to_simple(decimal.Decimal('4.50'), {}))
+
+        # Container subclasses become plain containers.
+        simple = serializer.to_simple(
+            SortedDict([('name', u'Cake'), ('tags', [u'a'])]), {})
+        self.assertEqual(dict, type(simple))
+        self.assertEqual(list, type(serializer.to_simple(Tags([u'a']), {})))
+        self.assertFalse('!!python/object' in serializer.to_yaml(
+            SortedDict([('name', u'Cake'), ('tags', [u'a'])])))
+
+    def test_register_simple_converter(self):
+        serializer = Serializer()
+        value = uuid.UUID('12345678123456781234567812345678')
+
+        self.assertEqual(
+            u'12345678-1234-5678-1234-567812345678',
+            serializer.to_simple(value, {}))
+
+        serializer.register_simple_converter(
+            uuid.UUID, lambda data, options: data.hex)
+        serializer.register_simple_converter(
+            decimal.Decimal, lambda data, options: float(data))
+
+        self.assertEqual(
+            {'id': u'12345678123456781234567812345678', 'price': 4.5},
+            serializer.to_simple(
+                {'id': value, 'price': decimal.Decimal('4.50')}, {}))
+        self.assertEqual(
+            u'{"id": "12345678123456781234567812345678"}',
+            serializer.to_json({'id': value}))
+
+        # Converting native types means walking everything with ``to_simple``.
+        self.assertTrue(serializer.simplify_json_natively)
+        serializer.register_simple_converter(
+            unicode, lambda data, options: data.upper())
+        self.assertFalse(serializer.simplify_json_natively)
+        self.assertEqual(u'["CAKE"]', serializer.to_json([u'cake']))
@@ -0,0 +1,148 @@
+import time
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+
+from delicious_cake.models import ApiAccess, ApiAccessRollup
+from delicious_cake.throttle import (
+    AccessLogBuffer, CacheCounterThrottle, CacheDBThrottle,)
+
+__all__ = ('ThrottleTestCase',)
+
+
+class MemoryAccessLogBuffer(AccessLogBuffer):
+    # Keeps flushed records instead of writing them, so the background
+    # thread doesn't need the database.
+    def __init__(self, *args, **kwargs):
+        super(MemoryAccessLogBuffer, self).__init__(*args, **kwargs)
+        self.flushed = []
+
+    def flush(self):
+        with self.lock:
+            self.flushed.extend(self.records)
+            self.records.clear()
+
+
+class ThrottleTestCase(TestCase):
+    def setUp(self):
+        super(ThrottleTestCase, self).setUp()
+        cache.clear()
+
+    def test_cache_counter_throttle(self):
+        throttle = CacheCounterThrottle(throttle_at=3, timeframe=3600)
+
+        self.assertEqual(
+            [False, False, False, True, True],
+            [throttle.should_be_throttled('cake') for i in range(5)])
+
+        # Other identifiers are counted separately.
+        self.assertFalse(throttle.should_be_throttled('pie'))
+
+        # A single number is kept per user and window.
+        self.assertEqual(5, cache.get(throttle.get_window_key('cake')))
+
+    def test_cache_counter_throttle_window(self):
+        throttle = CacheCounterThrottle(throttle_at=3, timeframe=60)
+
+        now = time.time()
+
+        self.assertNotEqual(
+            throttle.get_window_key('cake', now),
+            throttle.get_window_key('cake', now + 60))
+
+    def test_cache_db_throttle_write_behind(self):
+        throttle = CacheDBThrottle(
+            write_behind=True, batch_size=10, flush_interval=3600)
+
+        for i in range(3):
+            throttle.accessed('cake', url='/cakes/', request_method='get')
+
+        # Nothing is written during the request...
+        self.assertEqual(0, ApiAccess.objects.count())
+
+        # ...only when the buffer is flushed.
+        throttle.flush()
+        self.assertEqual(3, ApiAccess.objects.filter(
+            identifier='cake', url='/cakes/', request_method='get').count())
+        self.assertEqual(0, len(throttle.buffer.records))
+
+    def test_access_log_buffer_drop_policy(self):
+        buf = AccessLogBuffer(
+            batch_size=10, flush_interval=3600, max_buffer=2)
+
+        for identifier in ('a', 'b', 'c'):
+            buf.add(ApiAccess(identifier=identifier, accessed=0))
+
+        self.assertEqual(1, buf.dropped)
+        self.assertEqual(['b', 'c'], [r.identifier for r in buf.records])
+        buf.records.clear()
+
+        buf = AccessLogBuffer(
+            batch_size=10, flush_interval=3600, max_buffer=2,
+            drop_policy=AccessLogBuffer.DROP_NEWEST)
+
+        for identifier in ('a', 'b', 'c'):
+            buf.add(ApiAccess(identifier=identifier, accessed=0))
+
+        self.assertEqual(['a', 'b'], [r.identifier for r in buf.records])
+        buf.records.clear()
+
+    def test_access_log_buffer_batches(self):
+        buf = MemoryAccessLogBuffer(batch_size=2, flush_interval=3600)
+
+        try:
+            # Every full batch wakes the thread up, however they're timed.
+            for count in (2, 4, 6):
+                for i in range(2):
+                    buf.add(ApiAccess(identifier='cake', accessed=0))
+
+                deadline = time.time() + 5
+
+                while len(buf.flushed) < count and time.time() < deadline:
+                    time.sleep(0.01)
+
+                self.assertEqual(count, len(buf.flushed))
+        finally:
+            buf.close()
+
+        self.assertFalse(buf.thread.is_alive())
+
+    def test_compact_api_access(self):
+        hour = ApiAccessRollup.PERIOD_SECONDS[ApiAccessRollup.HOUR]
+        start = ApiAccessRollup.get_bucket(int(time.time()), 'day') - 86400
+
+        ApiAccess.objects.bulk_create(
+            [ApiAccess(identifier='cake', url='/cakes/', request_method='get',
+                       accessed=start + i) for i in range(5)] +
+            [ApiAccess(identifier='cake', url='/cakes/', request_method='get',
+                       accessed=start + hour)] +
+            [ApiAccess(identifier='pie', url='/cakes/', request_method='post',
+                       accessed=start)])
+
+        call_command('compact_api_access', batch_size=3, verbosity=0)
+
+        self.assertEqual(0, ApiAccess.objects.count())
+
+        rollups = ApiAccessRollup.objects.filter(identifier='cake')
+
+        self.assertEqual(
+            [(start, 5), (start + hour, 1)],
+            list(rollups.filter(period='hour').order_by('bucket').values_list(
+                'bucket', 'count')))
+        self.assertEqual(
+            [(start, 6)],
+            list(rollups.filter(period='day').values_list('bucket', 'count')))
+        self.assertEqual(2, rollups.filter(period='minute').count())
+
+        # Compacting again adds to the existing rollups.
+        ApiAccess.objects.bulk_create([ApiAccess(
+            identifier='pie', url='/cakes/', request_method='post',
+            accessed=start + 1)])
+
+        call_command('compact_api_access', periods='day', verbosity=0)
+
+        self.assertEqual(2, ApiAccessRollup.objects.get(
+            identifier='pie', period='day', bucket=start).count)
+        self.assertEqual(1, ApiAccessRollup.objects.get(
+            identifier='pie', period='hour', bucket=start).count)
@@ -19,6 +19,43 @@ urlpatterns = patterns('',
     url(r'^bare/simple/$', ForcedSimpleListResource.as_view(),
         name='bare-simple-list'),
 
+    url(r'^projected/simple/$', ProjectedSimpleListResource.as_view(),
+        name='projected-simple-list'),
+
+    url(r'^streamed/simple/$', StreamedSimpleListResource.as_view(),
+        name='streamed-simple-list'),
+    url(r'^streamed/broken/$', BrokenStreamedListResource.as_view(),
+        name='streamed-broken-list'),
+    url(r'^streamed/hooked/$', HookedStreamedListResource.as_view(),
+        name='streamed-hooked-list'),
+
+    url(r'^basic/simple/$', BasicPaginatorSimpleListResource.as_view(),
+        name='basic-paginator-simple-list'),
+
+    url(r'^projected/cursor/simple/$',
+        ProjectedCursorSimpleListResource.as_view(),
+        name='projected-cursor-simple-list'),
+
+    url(r'^cursor/simple/$', CursorSimpleListResource.as_view(),
+        name='cursor-simple-list'),
+
+    url(r'^limited/simple/$', LimitedSimpleListResource.as_view(),
+        name='limited-simple-list'),
+
+    url(r'^import/simple/$', ImportSimpleListResource.as_view(),
+        name='import-simple-list'),
+
+    url(r'^cached/simple/(?P<pk>\d+)/$', CachedSimpleDetailResource.as_view(),
+        name='cached-simple-detail'),
+    url(r'^cached/simple/$', CachedSimpleListResource.as_view(),
+        name='cached-simple-list'),
+
+    url(r'^conditional/simple/(?P<pk>\d+)/$',
+        ConditionalSimpleDetailResource.as_view(),
+        name='conditional-simple-detail'),
+    url(r'^conditional/simple/$', ConditionalSimpleListResource.as_view(),
+        name='conditional-simple-list'),
+
     url(r'^custom/simple/(?P<pk>\d+)/$',
         CustomEntityDetailResource.as_view(),
         name='custom-entity-detail'),
@@ -37,5 +74,12 @@ urlpatterns = patterns('',
     url(r'^custom/create/$', CustomCreateListResource.as_view(),
         name='custom-create-detail'),
 
+    url(r'^pastries/$', PastryListResource.as_view(), name='pastry-list'),
+    url(r'^sparse/pastries/$', SparsePastryListResource.as_view(),
+        name='sparse-pastry-list'),
+    url(r'^sparse/related/pastries/$',
+        SelectRelatedPastryListResource.as_view(),
+        name='select-related-pastry-list'),
+
     url(r'^upload/$', CakeUploadResource.as_view(),
         name='upload-resource'),)